@@ -1,16 +1,12 @@
 import streamlit as st
-from PIL import Image
+
+from utils.bootstrap import sidebar_header
 
 st.set_page_config(
     page_title="Home",
 )
 
-image = Image.open('logo.png')
-st.sidebar.image(image, width=120)
-
-st.sidebar.markdown('# Curry Company')
-st.sidebar.markdown('## Fastest Delivery in Town')
-st.sidebar.markdown("""___""")
+sidebar_header()
 
 st.write("# Curry Company Growth Dashboard")
 
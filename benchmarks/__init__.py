@@ -0,0 +1,4 @@
+"""
+    Benchmarks do pipeline de dados do dashboard.
+    Execute a partir da raiz do repositório, ex.: python -m benchmarks.bench_clean_code
+"""
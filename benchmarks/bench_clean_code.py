@@ -0,0 +1,93 @@
+#==================================================
+# Import das Bibliotecas
+#==================================================
+
+import argparse
+import time
+import tracemalloc
+
+import pandas as pd
+
+from utils.data import DATASET_PATH, clean_code
+
+#==================================================
+# Funções
+#==================================================
+def clean_code_legacy(df1):
+    """
+        Versão original da limpeza (cinco filtros encadeados, strips separados
+        e apply linha a linha), mantida aqui apenas como referência do benchmark.
+    """
+    linhas_vazias = df1['Delivery_person_Age'] != 'NaN '
+    df1 = df1.loc[linhas_vazias, :]
+    linhas_vazias = df1['multiple_deliveries'] != 'NaN '
+    df1 = df1.loc[linhas_vazias, :]
+    linhas_vazias = df1['Road_traffic_density'] != 'NaN'
+    df1 = df1.loc[linhas_vazias, :]
+    linhas_vazias = df1['City'] != 'NaN'
+    df1 = df1.loc[linhas_vazias, :]
+    linhas_vazias = df1['Festival'] != 'NaN'
+    df1 = df1.loc[linhas_vazias, :]
+
+    df1['Delivery_person_Age'] = df1['Delivery_person_Age'].astype(int).copy()
+    df1['Delivery_person_Ratings'] = df1['Delivery_person_Ratings'].astype(float)
+    df1['multiple_deliveries'] = df1['multiple_deliveries'].astype(int).copy()
+
+    df1.loc[:, 'ID'] = df1.loc[:, 'ID'].str.strip()
+    df1.loc[:, 'Delivery_person_ID'] = df1.loc[:, 'Delivery_person_ID'].str.strip()
+    df1.loc[:, 'Road_traffic_density'] = df1.loc[:, 'Road_traffic_density'].str.strip()
+    df1.loc[:, 'Type_of_order'] = df1.loc[:, 'Type_of_order'].str.strip()
+    df1.loc[:, 'Type_of_vehicle'] = df1.loc[:, 'Type_of_vehicle'].str.strip()
+    df1.loc[:, 'Festival'] = df1.loc[:, 'Festival'].str.strip()
+    df1.loc[:, 'City'] = df1.loc[:, 'City'].str.strip()
+
+    df1['Order_Date'] = pd.to_datetime(df1['Order_Date'], format='%d-%m-%Y')
+
+    df1['Time_taken(min)'] = df1['Time_taken(min)'].apply( lambda x: x.split('(min) ')[1])
+    df1['Time_taken(min)'] = df1['Time_taken(min)'].astype(int)
+
+    return df1
+
+def measure(func, df):
+    """
+        Mede o tempo (sem tracemalloc, que distorce o tempo) e o pico de memória
+        alocada durante a chamada (com tracemalloc, em uma segunda execução).
+        
+        Output: (segundos, pico em MB)
+    """
+    start = time.perf_counter()
+    func(df.copy())
+    seconds = time.perf_counter() - start
+
+    df = df.copy()
+    tracemalloc.start()
+    func(df)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return seconds, peak / 1024 ** 2
+
+def run(path, scales):
+    raw = pd.read_csv(path)
+
+    pd.testing.assert_frame_equal(clean_code_legacy(raw.copy()), clean_code(raw.copy()))
+
+    print('{:>6} {:>10} {:>12} {:>9} {:>14} {:>10}'.format('scale', 'rows', 'versão', 'seg', 'linhas/seg', 'pico MB'))
+    for scale in scales:
+        df = pd.concat([raw] * scale, ignore_index=True)
+        for name, func in [('legacy', clean_code_legacy), ('vetorizada', clean_code)]:
+            seconds, peak_mb = measure(func, df)
+            print('{:>5}x {:>10} {:>12} {:>9.3f} {:>14,.0f} {:>10.1f}'.format(
+                scale, len(df), name, seconds, len(df) / seconds, peak_mb))
+
+#==================================================
+# Execução
+#==================================================
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compara a limpeza original com a vetorizada.')
+    parser.add_argument('--csv', default=DATASET_PATH, help='csv bruto usado como base')
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10, 100],
+                        help='quantas vezes o csv é replicado em cada rodada')
+    args = parser.parse_args()
+    run(args.csv, args.scales)
@@ -0,0 +1,95 @@
+#==================================================
+# Import das Bibliotecas
+#==================================================
+
+import argparse
+import ast
+import importlib
+import json
+import os
+import subprocess
+import sys
+import time
+
+#==================================================
+# Configurações
+#==================================================
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PAGES = ['Home.py', 'pages/1_visao_empresa.py', 'pages/2_visao_entregadores.py', 'pages/3_visao_restaurantes.py']
+
+#==================================================
+# Funções
+#==================================================
+def _import_nodes(path):
+    """
+        Imports do topo da página e as atribuições com lazy_import (sem o layout do Streamlit)
+    """
+    with open(path) as f:
+        tree = ast.parse(f.read(), filename=path)
+    tree.body = [node for node in tree.body
+                 if isinstance(node, (ast.Import, ast.ImportFrom))
+                 or (isinstance(node, ast.Assign) and 'lazy_import(' in ast.unparse(node.value))]
+    return compile(tree, path, 'exec')
+
+def measure_page(path):
+    """
+        Executado em um processo novo: tempo dos imports da página e, em seguida, da primeira
+        importação de cada LazyModule alcançável pela página (módulos que os painéis
+        podem carregar quando são renderizados). Só o streamlit é importado antes, como no
+        servidor; o pandas fica fora deste processo para entrar no tempo da página.
+
+        Output: lista de (etapa, segundos)
+    """
+    import streamlit  # noqa: F401
+
+    sys.path.insert(0, ROOT)
+    namespace = {'__name__': 'benchmarks.pages'}
+    start = time.perf_counter()
+    exec(_import_nodes(path), namespace)
+    results = [('imports', time.perf_counter() - start)]
+
+    from utils.lazy import LazyModule
+    scopes = [namespace] + [vars(module) for name, module in list(sys.modules.items()) if name.startswith('utils.')]
+    lazy_names = sorted({value._name for scope in scopes for value in scope.values() if isinstance(value, LazyModule)})
+    for name in lazy_names:
+        if name in sys.modules:
+            continue
+        start = time.perf_counter()
+        importlib.import_module(name)
+        results.append(('lazy:' + name, time.perf_counter() - start))
+    return results
+
+def run(pages=PAGES, repeat=3):
+    """
+        Mede cada página em repeat processos novos (vale o menor tempo de cada etapa)
+
+        Output: Dataframe com as colunas 'page', 'stage' e 'seconds'
+    """
+    import pandas as pd
+
+    results = []
+    for page in pages:
+        for _ in range(repeat):
+            out = subprocess.run([sys.executable, '-m', 'benchmarks.bench_imports', '--child', page],
+                                 cwd=ROOT, capture_output=True, text=True, check=True).stdout
+            results += [{'page': page, 'stage': stage, 'seconds': seconds} for stage, seconds in json.loads(out)]
+    df = pd.DataFrame(results)
+    return df.groupby(['page', 'stage'], sort=False)['seconds'].min().reset_index()
+
+#==================================================
+# Execução
+#==================================================
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Tempo de import de cada página do dashboard.')
+    parser.add_argument('pages', nargs='*', default=PAGES, help='páginas medidas')
+    parser.add_argument('--repeat', type=int, default=3, help='processos por página (vale o menor tempo)')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure_page(os.path.join(ROOT, args.child))))
+    else:
+        print(run(args.pages, args.repeat).to_string(index=False, float_format='{:.3f}'.format))
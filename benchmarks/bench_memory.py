@@ -0,0 +1,69 @@
+#==================================================
+# Import das Bibliotecas
+#==================================================
+
+import argparse
+import os
+import tempfile
+
+import pandas as pd
+
+from benchmarks.generate import write_orders
+from utils.data import DATASET_PATH, ORDER_COLUMNS, add_distance, bytes_per_order, clean_code, to_snapshot_dtypes
+
+#==================================================
+# Funções
+#==================================================
+def memory_by_column(df1):
+    """
+        Bytes por pedido de cada coluna (incluindo os textos), com o tipo da coluna
+    """
+    usage = df1.memory_usage(deep=True, index=False) / max(len(df1), 1)
+    return pd.DataFrame({'dtype': df1.dtypes.astype(str), 'bytes_per_order': usage})
+
+def memory_report(csv_path):
+    """
+        Memória por pedido de cada representação do dataset:
+
+        - csv: csv bruto lido pelo pandas
+        - clean_code: dataset limpo com os tipos do pandas (int64/float64/object), o modelo antigo
+        - snapshot: todas as colunas com os tipos compactos do snapshot (utils.data.to_snapshot_dtypes)
+        - páginas: só as colunas declaradas pelas páginas (utils.data.ORDER_COLUMNS)
+
+        Output: (Dataframe com bytes por pedido de cada representação, Dataframe por coluna das páginas)
+    """
+    raw = pd.read_csv(csv_path)
+    df_clean = add_distance(clean_code(raw))
+    df_snapshot = add_distance(to_snapshot_dtypes(clean_code(raw)))
+    df_pages = df_snapshot.loc[:, ORDER_COLUMNS]
+
+    frames = [('csv', raw), ('clean_code', df_clean), ('snapshot', df_snapshot), ('páginas', df_pages)]
+    df_report = pd.DataFrame({'rows': [len(df) for _, df in frames],
+                              'columns': [df.shape[1] for _, df in frames],
+                              'bytes_per_order': [bytes_per_order(df) for _, df in frames],
+                              'total_mb': [df.memory_usage(deep=True).sum() / 1024 ** 2 for _, df in frames]},
+                             index=[name for name, _ in frames])
+    df_report['vs_clean_code'] = df_report['bytes_per_order'] / df_report.loc['clean_code', 'bytes_per_order']
+    return df_report, memory_by_column(df_pages)
+
+#==================================================
+# Execução
+#==================================================
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Memória por pedido do dataframe dos pedidos.')
+    parser.add_argument('csv', nargs='?', default=DATASET_PATH, help='csv bruto de pedidos')
+    parser.add_argument('--scale', type=float, help='usa um csv sintético com scale vezes o dataset de amostra')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        csv_path = args.csv
+        if args.scale:
+            csv_path = os.path.join(data_dir, 'train-{}x.csv'.format(args.scale))
+            write_orders(csv_path, args.scale, args.seed)
+        df_report, df_columns = memory_report(csv_path)
+
+    print(df_report.to_string(float_format='{:.2f}'.format))
+    print()
+    print(df_columns.to_string(float_format='{:.2f}'.format))
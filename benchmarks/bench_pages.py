@@ -0,0 +1,215 @@
+#==================================================
+# Import das Bibliotecas
+#==================================================
+
+import argparse
+import ast
+import contextlib
+import datetime
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks.generate import BASE_ROWS, write_orders
+from utils.cube import build_cube
+from utils.data import add_distance, clean_code, to_snapshot_dtypes
+from utils.dates import Calendar, daily_orders, time_buckets
+from utils.kpis import compute_kpis
+from utils.sketches import build_sketches
+
+#==================================================
+# Configurações
+#==================================================
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PAGES = ['pages/1_visao_empresa.py', 'pages/2_visao_entregadores.py', 'pages/3_visao_restaurantes.py']
+
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+
+#==================================================
+# Funções
+#==================================================
+def load_page_functions(path):
+    """
+        Carrega as funções de uma página sem executar o layout do Streamlit:
+        só os imports (incluindo os lazy_import de utils.lazy) e as definições de
+        funções do arquivo são executados.
+        
+        Output: dicionário nome -> objeto do módulo da página
+    """
+    with open(path) as f:
+        tree = ast.parse(f.read(), filename=path)
+    tree.body = [node for node in tree.body
+                 if isinstance(node, (ast.Import, ast.ImportFrom, ast.FunctionDef))
+                 or (isinstance(node, ast.Assign) and 'lazy_import(' in ast.unparse(node.value))]
+    namespace = {'__name__': 'benchmarks.pages.' + os.path.basename(path)[:-3]}
+    exec(compile(tree, path, 'exec'), namespace)
+    return namespace
+
+def timed(func, *args, repeat=3):
+    """
+        Menor tempo (segundos) de repeat chamadas de func(*args)
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def bench_functions(raw, repeat=3):
+    """
+        Tempo das funções das páginas sobre o csv bruto raw
+        
+        Output: lista de (etapa, segundos)
+    """
+    page1, page2, page3 = (load_page_functions(os.path.join(ROOT, page)) for page in PAGES)
+
+    df1 = add_distance(to_snapshot_dtypes(clean_code(raw)))
+    df_cube = build_cube(df1)
+    df_sketch = build_sketches(df1)
+    calendar = Calendar(df1['Order_Date'])
+    df_daily = daily_orders(df1, calendar)
+    df_period = time_buckets(df_daily, calendar, 'week')
+
+    stages = [
+        ('clean_code', clean_code, raw),
+        ('snapshot_dtypes', lambda df: add_distance(to_snapshot_dtypes(df)), clean_code(raw)),
+        ('build_cube', build_cube, df1),
+        ('build_sketches', build_sketches, df1),
+        ('order_metric', page1['order_metric'], df_cube),
+        # Os gráficos por período re-agregam a tabela diária (ver utils.dates)
+        ('daily_orders', daily_orders, df1, calendar),
+        ('time_buckets', time_buckets, df_daily, calendar, 'week'),
+        ('order_by_period', page1['order_by_period'], df_period),
+        ('order_share_by_period', page1['order_share_by_period'], df_period),
+        ('country_maps', page1['country_maps'], df1, df_sketch),
+        ('top_delivers', page2['top_delivers'], df1),
+        # A distância média (função distance) é uma das métricas de utils.kpis
+        ('distance', compute_kpis, df1),
+        ('avg_std_time_on_traffic', page3['avg_std_time_on_traffic'], df_cube),
+    ]
+    return [(name, timed(func, *args, repeat=repeat)) for name, func, *args in stages]
+
+@contextlib.contextmanager
+def app_directory(csv_path):
+    """
+        Diretório temporário de trabalho do app, com o csv em dataset/train.csv e o logo
+        (os artefatos derivados do csv são gravados ali e descartados no fim)
+    """
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as app_dir:
+        os.makedirs(os.path.join(app_dir, 'dataset'))
+        os.symlink(os.path.abspath(csv_path), os.path.join(app_dir, 'dataset', 'train.csv'))
+        os.symlink(os.path.join(ROOT, 'logo.png'), os.path.join(app_dir, 'logo.png'))
+        os.chdir(app_dir)
+        try:
+            yield app_dir
+        finally:
+            os.chdir(cwd)
+
+def bench_render(csv_path):
+    """
+        Renderização completa de cada página no AppTest (Streamlit sem navegador),
+        em um diretório temporário com o csv gerado em dataset/train.csv.
+        A primeira execução (fria) inclui o snapshot e os agregados; em seguida é medida a
+        espera pelo pré-cálculo das figuras (utils.figures) e a segunda execução usa os caches.
+        
+        Output: lista de (etapa, segundos)
+    """
+    from streamlit.testing.v1 import AppTest
+
+    from utils.figures import wait_warm_up
+
+    results = []
+    with app_directory(csv_path):
+        for page in PAGES:
+            name = os.path.basename(page)
+            for run in ['cold', 'warm_up', 'warm']:
+                start = time.perf_counter()
+                if run == 'warm_up':
+                    wait_warm_up()
+                else:
+                    at = AppTest.from_file(os.path.join(ROOT, page), default_timeout=3600).run()
+                    if at.exception:
+                        raise RuntimeError('{}: {}'.format(page, at.exception[0].value))
+                results.append(('render:{}:{}'.format(name, run), time.perf_counter() - start))
+    return results
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run(scales, repeat=3, render=True, seed=0, out=None):
+    """
+        Gera o csv de cada escala, mede as funções e as páginas e grava o json de resultados
+        
+        Output: caminho do json gravado
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as data_dir:
+        for scale in scales:
+            csv_path = os.path.join(data_dir, 'train-{}x.csv'.format(scale))
+            rows = write_orders(csv_path, scale, seed)
+            raw = pd.read_csv(csv_path)
+
+            measures = bench_functions(raw, repeat)
+            del raw
+            if render:
+                measures += bench_render(csv_path)
+
+            for stage, seconds in measures:
+                results.append({'scale': scale, 'rows': rows, 'stage': stage, 'seconds': round(seconds, 6)})
+                print('{:>6}x {:>10} {:<45} {:>10.4f}s'.format(scale, rows, stage, seconds))
+
+    meta = {'created_at': datetime.datetime.now().isoformat(timespec='seconds'), 'commit': _git_commit(),
+            'base_rows': BASE_ROWS, 'repeat': repeat, 'seed': seed, 'python': platform.python_version(),
+            'pandas': pd.__version__, 'machine': platform.machine(), 'cpus': os.cpu_count()}
+
+    if out is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        out = os.path.join(RESULTS_DIR, 'bench_pages-{}.json'.format(time.strftime('%Y%m%d-%H%M%S')))
+    with open(out, 'w') as f:
+        json.dump({'meta': meta, 'results': results}, f, indent=2)
+    return out
+
+def compare(old_path, new_path):
+    """
+        Compara dois json de resultados, etapa a etapa (razão novo / antigo)
+    """
+    frames = []
+    for label, path in [('old', old_path), ('new', new_path)]:
+        with open(path) as f:
+            frames.append(pd.DataFrame(json.load(f)['results']).set_index(['scale', 'stage'])['seconds'].rename(label))
+    df = pd.concat(frames, axis=1).dropna()
+    df['ratio'] = df['new'] / df['old']
+    return df
+
+#==================================================
+# Execução
+#==================================================
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark das funções e páginas do dashboard com dados sintéticos.')
+    parser.add_argument('--scales', type=float, nargs='+', default=[1, 10],
+                        help='múltiplos do dataset de amostra (1 a 1000)')
+    parser.add_argument('--repeat', type=int, default=3, help='repetições por função (vale o menor tempo)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-render', action='store_true', help='não renderiza as páginas no AppTest')
+    parser.add_argument('--out', help='json de saída (padrão: benchmarks/results/bench_pages-<data>.json)')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help='compara dois json de resultados')
+    args = parser.parse_args()
+
+    if args.compare:
+        print(compare(*args.compare).to_string(float_format='{:.4f}'.format))
+    else:
+        print('Resultados em', run(args.scales, args.repeat, not args.no_render, args.seed, args.out))
@@ -0,0 +1,128 @@
+#==================================================
+# Import das Bibliotecas
+#==================================================
+
+import argparse
+import datetime
+import itertools
+import os
+import tempfile
+import tracemalloc
+
+import pandas as pd
+
+from benchmarks.bench_pages import PAGES, ROOT, app_directory
+from benchmarks.generate import write_orders
+from utils.bootstrap import DATE_MIN
+from utils.data import DATASET_PATH, ORDER_COLUMNS, is_frozen, read_snapshot, snapshot_path
+from utils.figures import traffic_subsets
+from utils.sqlstore import SQL_BACKEND
+
+#==================================================
+# Configurações
+#==================================================
+
+# Datas limite usadas pelas sessões (junto com os subconjuntos das condições de trânsito);
+# a data mínima do slider seleciona um recorte vazio, que sai como view do dataset compartilhado
+SESSION_DATES = [datetime.datetime(2022, 4, 6), datetime.datetime(2022, 3, 20), datetime.datetime(2022, 3, 1),
+                 DATE_MIN]
+
+#==================================================
+# Funções
+#==================================================
+def rss_anon():
+    """
+        Memória anônima residente do processo em bytes (RssAnon do Linux): heap e arrays
+        privados, sem as páginas de arquivos mapeados (o snapshot lido por memory map fica no
+        cache do sistema operacional, compartilhado entre processos). None fora do Linux.
+    """
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('RssAnon:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        return None
+    return None
+
+def _memory(sessions):
+    current, _ = tracemalloc.get_traced_memory()
+    return {'sessions': sessions, 'traced_mb': current / 1024 ** 2,
+            'rss_anon_mb': (rss_anon() or 0) / 1024 ** 2}
+
+def load_test(csv_path, sessions=20, distinct=True):
+    """
+        Abre sessões do app (AppTest, no mesmo processo como no servidor) uma a uma, em
+        rodízio pelas páginas, mantendo todas vivas, e mede a memória depois de cada uma.
+
+        Com distinct cada sessão usa outro estado dos filtros (data limite e condições de
+        trânsito), então o crescimento inclui os caches por estado, que são limitados;
+        sem distinct todas usam os filtros padrão e sobra só o custo próprio de cada sessão.
+        O AppTest guarda a árvore de elementos renderizados, então os números são um
+        limite superior do que o servidor guarda por sessão.
+
+        Output: (Dataframe com a memória após cada sessão, bytes do dataset compartilhado)
+    """
+    from streamlit.testing.v1 import AppTest
+
+    from utils.figures import wait_warm_up
+    from utils.filters import load_order_filter
+
+    # A data limite varia mais rápido, então poucas sessões já passam por todas as datas
+    filters = itertools.cycle(itertools.product(traffic_subsets()[1:], SESSION_DATES))
+    with app_directory(csv_path):
+        tracemalloc.start()
+        # Primeira sessão de cada página: carrega o dataset e monta os caches compartilhados
+        apps = [AppTest.from_file(os.path.join(ROOT, page), default_timeout=3600).run() for page in PAGES]
+        wait_warm_up()
+        store_bytes = read_snapshot(snapshot_path(DATASET_PATH), ORDER_COLUMNS).memory_usage(deep=True).sum()
+        # Com o backend SQL as páginas não carregam as linhas dos pedidos (exceto o mapa sem células pré-calculadas)
+        store = None if SQL_BACKEND else load_order_filter().df1
+        store_blocks = store._mgr.nblocks if store is not None else None
+        measures = [_memory(0)]
+
+        for session, page in zip(range(1, sessions + 1), itertools.cycle(PAGES)):
+            at = AppTest.from_file(os.path.join(ROOT, page), default_timeout=3600).run()
+            if distinct:
+                traffic_options, date_limit = next(filters)
+                at.slider[0].set_value(date_limit)
+                at.multiselect[0].set_value(list(traffic_options))
+                at.run()
+            if at.exception:
+                raise RuntimeError('{}: {}'.format(page, at.exception[0].value))
+            apps.append(at)
+            measures.append(_memory(session))
+        tracemalloc.stop()
+
+        # Os filtros das sessões não podem ter consolidado nem liberado a escrita do dataset compartilhado
+        if store is not None and (store._mgr.nblocks != store_blocks or not is_frozen(store)):
+            raise RuntimeError('O dataset compartilhado foi consolidado ou ficou gravável')
+
+    return pd.DataFrame(measures), store_bytes
+
+#==================================================
+# Execução
+#==================================================
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Teste de carga: memória por sessão simultânea do dashboard.')
+    parser.add_argument('csv', nargs='?', help='csv bruto de pedidos (padrão: csv sintético de --scale)')
+    parser.add_argument('--scale', type=float, default=1, help='múltiplo do dataset de amostra do csv sintético')
+    parser.add_argument('--sessions', type=int, default=20)
+    parser.add_argument('--same-filters', action='store_true', help='todas as sessões com os filtros padrão')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        csv_path = args.csv
+        if csv_path is None:
+            csv_path = os.path.join(data_dir, 'train-{}x.csv'.format(args.scale))
+            write_orders(csv_path, args.scale, args.seed)
+        df_memory, store_bytes = load_test(csv_path, args.sessions, not args.same_filters)
+
+    print(df_memory.to_string(index=False, float_format='{:.2f}'.format))
+    print()
+    print('Dataset compartilhado (colunas das páginas): {:.2f} MB'.format(store_bytes / 1024 ** 2))
+    growth = df_memory.iloc[-1] - df_memory.iloc[0]
+    for col in ['traced_mb', 'rss_anon_mb']:
+        print('{} por sessão adicional: {:.3f} MB'.format(col, growth[col] / max(args.sessions, 1)))
@@ -0,0 +1,122 @@
+#==================================================
+# Import das Bibliotecas
+#==================================================
+
+import argparse
+
+import numpy as np
+import pandas as pd
+
+#==================================================
+# Configurações
+#==================================================
+
+# Linhas do dataset de amostra (dataset/train.csv): a escala 1x do gerador
+BASE_ROWS = 45_593
+
+# Colunas do csv bruto, na ordem do dataset original
+RAW_COLUMNS = ['ID', 'Delivery_person_ID', 'Delivery_person_Age', 'Delivery_person_Ratings',
+               'Restaurant_latitude', 'Restaurant_longitude', 'Delivery_location_latitude',
+               'Delivery_location_longitude', 'Order_Date', 'Time_Orderd', 'Time_Order_picked',
+               'Weatherconditions', 'Road_traffic_density', 'Vehicle_condition', 'Type_of_order',
+               'Type_of_vehicle', 'multiple_deliveries', 'Festival', 'City', 'Time_taken(min)']
+
+# Códigos de cidade dos IDs dos entregadores e coordenadas aproximadas dos restaurantes
+CITY_CODES = {'INDO': (22.72, 75.86), 'BANG': (12.97, 77.59), 'COIMB': (11.02, 76.96),
+              'CHEN': (13.08, 80.27), 'HYD': (17.39, 78.49), 'RANCHI': (23.34, 85.31),
+              'MYS': (12.30, 76.64), 'DEH': (30.32, 78.03), 'KOC': (9.93, 76.27),
+              'PUNE': (18.52, 73.86), 'LUDH': (30.90, 75.86), 'KNP': (26.45, 80.33),
+              'MUM': (19.08, 72.88), 'KOL': (22.57, 88.36), 'JAP': (26.91, 75.79),
+              'SUR': (21.17, 72.83), 'GOA': (15.30, 74.12), 'AURG': (19.88, 75.34),
+              'AGR': (27.18, 78.01), 'VAD': (22.31, 73.18), 'ALH': (25.44, 81.85), 'BHP': (23.26, 77.41)}
+
+ORDER_DATES = pd.date_range('2022-02-11', '2022-04-06')
+
+#==================================================
+# Funções
+#==================================================
+def _with_sentinel(rng, values, share, sentinel):
+    """
+        Troca uma fração share dos valores pelo marcador de dado ausente do csv bruto
+    """
+    values = np.asarray(values, dtype=object)
+    values[rng.random(len(values)) < share] = sentinel
+    return values
+
+def generate_orders(rows, seed=0, first_id=0):
+    """
+        Gera pedidos sintéticos no formato bruto do dataset (o que clean_code espera):
+        textos com espaços sobrando, marcadores 'NaN ' / 'conditions NaN',
+        datas '%d-%m-%Y' e tempo de entrega no formato '(min) N'.
+        
+        Input: quantidade de linhas, semente e primeiro número dos IDs dos pedidos
+        Output: Dataframe bruto
+    """
+    rng = np.random.default_rng(seed)
+    codes = np.array(list(CITY_CODES))
+    city_code = rng.integers(0, len(codes), rows)
+    centers = np.array(list(CITY_CODES.values()))
+
+    restaurant_lat = centers[city_code, 0] + rng.normal(0, 0.05, rows)
+    restaurant_lon = centers[city_code, 1] + rng.normal(0, 0.05, rows)
+    # Parte dos restaurantes vem com as coordenadas negativas, como no dataset original
+    negative = rng.random(rows) < 0.01
+    restaurant_lat[negative] *= -1
+
+    deliverer = pd.Series(codes[city_code]) + 'RES' + pd.Series(rng.integers(1, 21, rows)).map('{:02d}'.format) \
+                + 'DEL' + pd.Series(rng.integers(1, 4, rows)).map('{:02d}'.format) + ' '
+    time_taken = np.clip(rng.normal(26, 9, rows).round().astype(int), 10, 54)
+
+    df = pd.DataFrame({
+        'ID': pd.Series(np.arange(first_id, first_id + rows)).map('0x{:04x} '.format),
+        'Delivery_person_ID': deliverer,
+        'Delivery_person_Age': _with_sentinel(rng, rng.integers(20, 40, rows).astype(str), 0.04, 'NaN '),
+        'Delivery_person_Ratings': _with_sentinel(rng, np.round(rng.uniform(2.5, 5, rows), 1).astype(str), 0.04, 'NaN '),
+        'Restaurant_latitude': restaurant_lat.round(6),
+        'Restaurant_longitude': restaurant_lon.round(6),
+        'Delivery_location_latitude': (np.abs(restaurant_lat) + rng.uniform(-0.15, 0.15, rows)).round(6),
+        'Delivery_location_longitude': (restaurant_lon + rng.uniform(-0.15, 0.15, rows)).round(6),
+        'Order_Date': ORDER_DATES[rng.integers(0, len(ORDER_DATES), rows)].strftime('%d-%m-%Y'),
+        'Time_Orderd': _with_sentinel(rng, rng.choice(['11:30:00', '19:45:00', '21:10:00', '17:55:00'], rows), 0.04, 'NaN '),
+        'Time_Order_picked': rng.choice(['11:45:00', '20:00:00', '21:25:00', '18:10:00'], rows),
+        'Weatherconditions': rng.choice(['conditions Sunny', 'conditions Stormy', 'conditions Sandstorms',
+                                         'conditions Cloudy', 'conditions Fog', 'conditions Windy',
+                                         'conditions NaN'], rows, p=[.16, .16, .16, .16, .17, .17, .02]),
+        'Road_traffic_density': _with_sentinel(rng, rng.choice(['Low ', 'Medium ', 'High ', 'Jam '], rows,
+                                                               p=[.34, .24, .10, .32]), 0.01, 'NaN '),
+        'Vehicle_condition': rng.integers(0, 4, rows),
+        'Type_of_order': rng.choice(['Snack ', 'Meal ', 'Drinks ', 'Buffet '], rows),
+        'Type_of_vehicle': rng.choice(['motorcycle ', 'scooter ', 'electric_scooter ', 'bicycle '], rows,
+                                      p=[.58, .33, .08, .01]),
+        'multiple_deliveries': _with_sentinel(rng, rng.integers(0, 4, rows).astype(str), 0.02, 'NaN '),
+        'Festival': _with_sentinel(rng, rng.choice(['No ', 'Yes '], rows, p=[.98, .02]), 0.005, 'NaN '),
+        'City': _with_sentinel(rng, rng.choice(['Metropolitian ', 'Urban ', 'Semi-Urban '], rows,
+                                               p=[.75, .22, .03]), 0.03, 'NaN '),
+        'Time_taken(min)': pd.Series(time_taken).map('(min) {}'.format),
+    })
+    return df.loc[:, RAW_COLUMNS]
+
+def write_orders(path, scale=1, seed=0, chunksize=500_000):
+    """
+        Grava um csv bruto com BASE_ROWS * scale pedidos, gerado em blocos para que
+        escalas grandes (ex.: 1000x) não precisem caber inteiras na memória
+        
+        Output: quantidade de linhas gravadas
+    """
+    rows = int(BASE_ROWS * scale)
+    for i, start in enumerate(range(0, rows, chunksize)):
+        df = generate_orders(min(chunksize, rows - start), seed=seed + i, first_id=start)
+        df.to_csv(path, mode='w' if i == 0 else 'a', header=(i == 0), index=False)
+    return rows
+
+#==================================================
+# Execução
+#==================================================
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Gera um csv bruto sintético de pedidos.')
+    parser.add_argument('path', help='csv de saída')
+    parser.add_argument('--scale', type=float, default=1, help='múltiplo das linhas do dataset de amostra')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    print('{} linhas gravadas em {}'.format(write_orders(args.path, args.scale, args.seed), args.path))
@@ -3,132 +3,166 @@
 # Import das Bibliotecas
 #==================================================
 
-from haversine import haversine
-import plotly.express as px
-import plotly.graph_objects as go
-import folium
-import pandas as pd
-import numpy as np
+import functools
+
 import streamlit as st
-from PIL import Image
-from streamlit_folium import folium_static
+
+from utils.bootstrap import sidebar_filters
+from utils.cube import rollup
+from utils.data import LOCATION_COLUMNS
+from utils.dates import GRANULARITIES, orders_by_period
+from utils.figures import load_figure_cache
+from utils.filters import load_cube_filter, load_order_filter, load_sketch_filter
+from utils.geo import build_order_map
+from utils.instrument import finish_run, folium_static, instrumented, plotly_chart, start_run, step
+from utils.lazy import lazy_import
+from utils.panels import DeferredTabs
+from utils.precompute import load_artifacts
+from utils.scheduler import PanelScheduler
+from utils.sketches import median_locations
+
+# Bibliotecas de gráficos importadas só quando um painel as usa (ver utils.lazy)
+px = lazy_import('plotly.express')
 
 #==================================================
 # Funções
 #==================================================
-def country_maps(df1):
-    """
-        Função para plotar um mapa dos pedidos
-    """
-    df_aux = (df1.loc[:, ['City', 'Road_traffic_density', 'Delivery_location_latitude', 'Delivery_location_longitude']]
-                 .groupby(['City', 'Road_traffic_density'])
-                 .median()
-                 .reset_index())
-    map = folium.Map()
-    for index, location_info in df_aux.iterrows():
-        folium.Marker([location_info['Delivery_location_latitude'], location_info['Delivery_location_longitude']],
-                       popup=location_info[['City', 'Road_traffic_density']]).add_to(map)
+@instrumented
+def country_maps(df1, df_sketch, bins=None):
+    """
+        Função para plotar um mapa dos pedidos (medianas, mapas de calor e agrupamento, ver utils.geo)
+        As medianas dos locais de entrega vêm dos sketches de quantis, sem ordenar os pedidos,
+        e as células do mapa vêm dos artefatos pré-calculados quando existem (bins)
+    """
+    map = build_order_map(df1, df_medians=median_locations(df_sketch), bins=bins)
     folium_static(map, width=1024, height=600)
         
-def order_share_by_week(df1):
+@instrumented
+def order_share_by_period(df_period):
     """
-        Função para plotar um gráfico de linhas com a quantidade de ordens por semana e número único de entregadores
+        Função para plotar um gráfico de linhas com a quantidade de ordens por entregador único em cada período
+        Input: Dataframe de utils.dates.orders_by_period
     """
-    df_aux01 = df1.loc[:, ['ID', 'week_of_year']].groupby('week_of_year').count().reset_index()
-    df_aux02 = df1.loc[:, ['Delivery_person_ID', 'week_of_year']].groupby('week_of_year').nunique().reset_index()
-    df_aux = pd.merge(df_aux01, df_aux02, how='inner')
-    df_aux['order_by_deliver'] = df_aux['ID'] / df_aux['Delivery_person_ID']
-    fig = px.line(df_aux, x='week_of_year', y='order_by_deliver')
+    fig = px.line(df_period, x='period', y='order_by_deliver')
     return fig
         
-def order_by_week(df1):
+@instrumented
+def order_by_period(df_period):
     """
-        Função para plotar um gráfico de linhas com a quantidade de ordens por semana
+        Função para plotar um gráfico de linhas com a quantidade de ordens por período
+        Input: Dataframe de utils.dates.orders_by_period
     """
-    df1['week_of_year'] = df1['Order_Date'].dt.strftime('%U')
-    df_aux = df1.loc[:, ['ID', 'week_of_year']].groupby('week_of_year').count().reset_index()
-    fig = px.line(df_aux, x='week_of_year', y='ID')
+    fig = px.line(df_period, x='period', y='orders')
     return fig
         
-def traffic_order_city(df1):
+@instrumented
+def traffic_order_city(df_cube):
     """
         Função para plotar um gráfico de bolhas com ordens por tipo de tráfego e cidade
     """
-    df_aux = df1.loc[:, ['ID', 'City', 'Road_traffic_density']].groupby(['City', 'Road_traffic_density']).count().reset_index()
-    fig = px.scatter(df_aux, x='City', y='Road_traffic_density', size='ID', color='City')
+    df_aux = rollup(df_cube, ['City', 'Road_traffic_density'])
+    # O agrupamento por cor do plotly falha com categóricas quando o filtro não deixa nenhum pedido
+    df_aux = df_aux.astype({'City': str, 'Road_traffic_density': str})
+    fig = px.scatter(df_aux, x='City', y='Road_traffic_density', size='orders', color='City')
     return fig
 
-def traffic_order_share(df1):
+@instrumented
+def traffic_order_share(df_cube):
     
-    df_aux = df1.loc[:, ['ID', 'Road_traffic_density']].groupby('Road_traffic_density').count().reset_index()
-    df_aux['entregas_perc'] = df_aux['ID'] / df_aux['ID'].sum()
+    df_aux = rollup(df_cube, ['Road_traffic_density'])
+    df_aux['entregas_perc'] = df_aux['orders'] / df_aux['orders'].sum()
     fig = px.pie(df_aux, values='entregas_perc', names='Road_traffic_density')
     return fig
 
-def order_metric(df1):
+@instrumented
+def order_metric(df_cube):
     """
         Função para plotar um gráfico de barras de ordens por dia
     """
-    df_aux = df1.loc[:, ['ID', 'Order_Date']].groupby(['Order_Date']).count().reset_index()
-    fig = px.bar(df_aux, x='Order_Date', y='ID')    
+    df_aux = rollup(df_cube, ['Order_Date'])
+    fig = px.bar(df_aux, x='Order_Date', y='orders')    
     return fig
 
-def clean_code(df1):
-    """ 
-        Esta função tem a responsabilidade de limpar o dataframe 
-        Executei a minha limpeza que tem algumas coisas a mais do que a que o professor usou nas aulas
+def management_panel(date_slider, traffic_options):
+    """
+        Tab1: Visão Gerencial (figuras do cache de figuras, ver utils.figures,
+        calculadas em paralelo, ver utils.scheduler)
+    """
+    scheduler = PanelScheduler()
+    render_chart = functools.partial(plotly_chart, use_container_width=True)
+
+    # Cointainer 1
+    with st.container():
+        st.markdown('#### Orders by Day')
+        scheduler.submit(figure_cache.get, 'order_metric', date_slider, traffic_options, render=render_chart)
         
-        Tipos de limpeza:
-        1. Remoção dos dados NaN
-        2. Mudança do tipo da coluna de dados
-        3. Remoção dos espaços das variáveis de texto
-        4. Formatação da coluna de datas
-        5. Limpeza da coluna de tempo (remoção do texto da variável numérica)
+    # Container 2 
+    with st.container():
         
-        Input: Dataframe
-        Output: Dataframe
-    """
-    # 1. Excluir linhas com dados NaN
-    linhas_vazias = df1['Delivery_person_Age'] != 'NaN '
-    df1 = df1.loc[linhas_vazias, :]
-    linhas_vazias = df1['multiple_deliveries'] != 'NaN '
-    df1 = df1.loc[linhas_vazias, :]
-    linhas_vazias = df1['Road_traffic_density'] != 'NaN'
-    df1 = df1.loc[linhas_vazias, :]
-    linhas_vazias = df1['City'] != 'NaN'
-    df1 = df1.loc[linhas_vazias, :]
-    linhas_vazias = df1['Festival'] != 'NaN'
-    df1 = df1.loc[linhas_vazias, :]
-    
-    # 2. Converção do tipo de coluna de dados
-    df1['Delivery_person_Age'] = df1['Delivery_person_Age'].astype(int).copy()
-    df1['Delivery_person_Ratings'] = df1['Delivery_person_Ratings'].astype(float)
-    df1['multiple_deliveries'] = df1['multiple_deliveries'].astype(int).copy()
-
-    # 3. Remover os espaços a esquerda e a direita das strings
-    df1.loc[:, 'ID'] = df1.loc[:, 'ID'].str.strip()
-    df1.loc[:, 'Delivery_person_ID'] = df1.loc[:, 'Delivery_person_ID'].str.strip()
-    df1.loc[:, 'Road_traffic_density'] = df1.loc[:, 'Road_traffic_density'].str.strip()
-    df1.loc[:, 'Type_of_order'] = df1.loc[:, 'Type_of_order'].str.strip()
-    df1.loc[:, 'Type_of_vehicle'] = df1.loc[:, 'Type_of_vehicle'].str.strip()
-    df1.loc[:, 'Festival'] = df1.loc[:, 'Festival'].str.strip()
-    df1.loc[:, 'City'] = df1.loc[:, 'City'].str.strip()
-    
-    # 4. Formatação da coluna de datas
-    df1['Order_Date'] = pd.to_datetime(df1['Order_Date'], format='%d-%m-%Y')
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            st.markdown('#### Traffic Order Share')
+            scheduler.submit(figure_cache.get, 'traffic_order_share', date_slider, traffic_options, render=render_chart)
+            
+        with col2:
+            st.markdown('#### Traffic Order City')
+            scheduler.submit(figure_cache.get, 'traffic_order_city', date_slider, traffic_options, render=render_chart)
 
-    # 5. Limpeza da coluna 'Time_taken(min)'
-    df1['Time_taken(min)'] = df1['Time_taken(min)'].apply( lambda x: x.split('(min) ')[1])
-    df1['Time_taken(min)'] = df1['Time_taken(min)'].astype(int)
+    scheduler.run()
+
+def tactical_panel(date_slider, traffic_options):
+    """
+        Tab2: Visão Tática (períodos re-agregados a partir da tabela diária, ver utils.dates)
+    """
+    period_names = {'day': 'Day', 'week': 'Week', 'month': 'Month'}
+    granularity = st.radio('Período', GRANULARITIES, index=GRANULARITIES.index('week'),
+                           format_func=period_names.get, horizontal=True, key='period_visao_empresa')
+    df_period = orders_by_period(date_slider, traffic_options, granularity)
+
+    # Cointainer 1
+    with st.container():
+        st.markdown('#### Orders by {}'.format(period_names[granularity]))
+        fig = order_by_period(df_period)
+        plotly_chart(fig, use_container_width=True)
     
-    return df1
+    # Cointainer 2
+    with st.container():
+        st.markdown('#### Orders Share by {}'.format(period_names[granularity]))
+        fig = order_share_by_period(df_period)
+        plotly_chart(fig, use_container_width=True)
+
+def geographic_panel(date_slider, traffic_options):
+    """
+        Tab3: Visão Geográfica (as linhas dos pedidos e os sketches só são filtrados quando a aba está aberta;
+        com as células do mapa pré-calculadas, as linhas dos pedidos nem são carregadas)
+    """
+    st.markdown('#### Country Maps')
+    bins = artifacts.get('map_bins', date_slider, traffic_options)
+    with step('filter') as filter_step:
+        df_sketch = sketch_filter.filter(date_slider, traffic_options)
+        df1 = None
+        if bins is None:
+            df1 = load_order_filter().filter(date_slider, traffic_options, columns=LOCATION_COLUMNS)
+        filter_step.rows = len(df_sketch) if df1 is None else len(df1)
+    country_maps(df1, df_sketch, bins)
 
 #==================================================
 # Import e limpeza do dataset
 #==================================================
 
-df = pd.read_csv('dataset/train.csv')
-df1 = clean_code(df)
+start_run('visao_empresa')
+
+with step('load'):
+    cube_filter = load_cube_filter()
+    sketch_filter = load_sketch_filter()
+    artifacts = load_artifacts()
+
+figure_cache = load_figure_cache()
+figure_cache.register('order_metric', order_metric, cube_filter)
+figure_cache.register('traffic_order_share', traffic_order_share, cube_filter)
+figure_cache.register('traffic_order_city', traffic_order_city, cube_filter)
+figure_cache.start_warm_up(['order_metric', 'traffic_order_share', 'traffic_order_city'])
 
 #==================================================
 # Barra Lateral no Streamlit
@@ -136,36 +170,7 @@ df1 = clean_code(df)
 
 st.set_page_config(page_title='Visão Empresa', layout='wide')
 
-image = Image.open('logo.png')
-st.sidebar.image(image, width=120)
-
-st.sidebar.markdown('# Curry Company')
-st.sidebar.markdown('## Fastest Delivery in Town')
-st.sidebar.markdown("""___""")
-
-st.sidebar.markdown('## Selecione uma data limite')
-date_slider = st.sidebar.slider(
-    'Até qual valor?',
-    value=pd.datetime(2022, 4, 13),
-    min_value=pd.datetime(2022, 2, 11),
-    max_value=pd.datetime(2022, 4, 6),
-    format='DD-MM-YYYY')
-st.sidebar.markdown("""___""")
-
-traffic_options = st.sidebar.multiselect(
-    'Quais as condições do trânsito?',
-    ['Low', 'Medium', 'High', 'Jam'],
-    default=['Low', 'Medium', 'High', 'Jam'])
-st.sidebar.markdown("""___""")
-st.sidebar.markdown('### Powered by Comunidade DS')
-
-# Filtro de data
-linhas_selecionadas = df1['Order_Date'] < date_slider
-df1 = df1.loc[linhas_selecionadas, :]
-
-# Filtro de trânsito
-linhas_selecionadas = df1['Road_traffic_density'].isin(traffic_options)
-df1 = df1.loc[linhas_selecionadas, :]
+date_slider, traffic_options = sidebar_filters()
 
 #===================================================
 # Layout no Streamlit
@@ -173,46 +178,10 @@ df1 = df1.loc[linhas_selecionadas, :]
 
 st.header('Marketplace - Visão Empresa')
 
-tab1, tab2, tab3 = st.tabs(['Visão Gerencial', 'Visão Tática', 'Visão Geográfica'])
-
-# Tab1: Visão Gerencial
-with tab1:
-    # Cointainer 1
-    with st.container():
-        st.markdown('#### Orders by Day')
-        fig = order_metric(df1)
-        st.plotly_chart(fig, use_container_width=True)
-        
-    # Container 2 
-    with st.container():
-        
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            st.markdown('#### Traffic Order Share')
-            fig = traffic_order_share(df1)
-            st.plotly_chart(fig, use_container_width=True)
-            
-        with col2:
-            st.markdown('#### Traffic Order City')
-            fig = traffic_order_city(df1)
-            st.plotly_chart(fig, use_container_width=True)
-                   
-# Tab2: Visão Tática     
-with tab2:
-    # Cointainer 1
-    with st.container():
-        st.markdown('#### Orders by Week')
-        fig = order_by_week(df1)
-        st.plotly_chart(fig, use_container_width=True)
-    
-    # Cointainer 2
-    with st.container():
-        st.markdown('#### Orders Share by Week')
-        fig = order_share_by_week(df1)
-        st.plotly_chart(fig, use_container_width=True)
+tabs = DeferredTabs(['Visão Gerencial', 'Visão Tática', 'Visão Geográfica'], key='tab_visao_empresa')
+tabs.panel('Visão Gerencial', management_panel, date_slider, traffic_options)
+tabs.panel('Visão Tática', tactical_panel, date_slider, traffic_options)
+tabs.panel('Visão Geográfica', geographic_panel, date_slider, traffic_options)
+tabs.render()
 
-# Tab 3: Visão Geográfica        
-with tab3:
-    st.markdown('#### Country Maps')
-    country_maps(df1)
\ No newline at end of file
+finish_run()
@@ -3,35 +3,47 @@
 # Import das Bibliotecas
 #==================================================
 
-from haversine import haversine
-import plotly.express as px
-import plotly.graph_objects as go
-import folium
-import pandas as pd
 import numpy as np
 import streamlit as st
-from PIL import Image
-from streamlit_folium import folium_static
+
+from utils.bootstrap import sidebar_filters
+from utils.cube import rollup
+from utils.figures import load_figure_cache
+from utils.filters import load_cube_filter, load_sketch_filter
+from utils.geo import distance_by_city
+from utils.instrument import dataframe, finish_run, instrumented, plotly_chart, start_run, step
+from utils.kpis import load_kpi_engine
+from utils.lazy import lazy_import
+from utils.panels import DeferredTabs
+from utils.scheduler import PanelScheduler
+from utils.sketches import quantiles
+
+# Bibliotecas de gráficos importadas só quando um painel as usa (ver utils.lazy)
+px = lazy_import('plotly.express')
+go = lazy_import('plotly.graph_objects')
 
 #==================================================
 # Funções
 #==================================================
-def avg_std_time_on_traffic(df1):
-    df_aux = (df1.loc[:, ['City', 'Road_traffic_density', 'Time_taken(min)']]
-             .groupby(['City', 'Road_traffic_density'])
-             .agg({'Time_taken(min)': ['mean', 'std']}))
-    df_aux.columns = ['avg_time', 'std_time']
-    df_aux = df_aux.reset_index()
+@instrumented
+def avg_std_time_on_traffic(df_cube):
+    df_aux = (rollup(df_cube, ['City', 'Road_traffic_density'])
+             .loc[:, ['City', 'Road_traffic_density', 'time_mean', 'time_std']])
+    df_aux.columns = ['City', 'Road_traffic_density', 'avg_time', 'std_time']
+    # O sunburst reagrupa pelas categorias, inclusive as que não aparecem após o filtro
+    df_aux = df_aux.astype({'City': str, 'Road_traffic_density': str})
+    # Sem linhas após o filtro (nenhum trânsito selecionado) não há média para o ponto central da escala
+    midpoint = np.average(df_aux['std_time']) if len(df_aux) > 0 else None
 
     fig = px.sunburst(df_aux, path=['City', 'Road_traffic_density'], values='avg_time', 
                   color='std_time', color_continuous_scale='RdBu', 
-                  color_continuous_midpoint=np.average(df_aux['std_time']))
+                  color_continuous_midpoint=midpoint)
     return fig
 
-def avg_std_time_graph(df1):
-    df_aux = df1.loc[:, ['City', 'Time_taken(min)']].groupby('City'). agg({'Time_taken(min)': ['mean', 'std']})
-    df_aux.columns = ['avg_time', 'std_time']
-    df_aux = df_aux.reset_index()
+@instrumented
+def avg_std_time_graph(df_cube):
+    df_aux = rollup(df_cube, ['City']).loc[:, ['City', 'time_mean', 'time_std']]
+    df_aux.columns = ['City', 'avg_time', 'std_time']
 
     fig = go.Figure()
     fig.add_trace(go.Bar(name='Control', x=df_aux['City'], y=df_aux['avg_time'], error_y=dict(type='data', array=df_aux['std_time'])))
@@ -39,181 +51,86 @@ def avg_std_time_graph(df1):
 
     return fig
 
-def avg_std_time_delivery(df1, festival, op):
+def avg_std_time_delivery(kpis, festival, op):
     """
-        Esta função calcula o tempo médio e o desvio padrão do tempo de entrega.
+        Esta função retorna o tempo médio ou o desvio padrão do tempo de entrega.
         Parâmetros:
             Input:
-                - df: Dataframe com os dados necessários para o cálculo
-                - op: Tipo de operação que precisa ser calculada
-                    'avg_time': Calcula o tempo médio
-                    'std_time': Calcula o desvio padrão do tempo
+                - kpis: Métricas gerais do estado atual dos filtros (ver utils.kpis)
+                - festival: 'Yes' (com Festival) ou 'No' (sem Festival)
+                - op: Tipo de operação
+                    'avg_time': Tempo médio
+                    'std_time': Desvio padrão do tempo
             Output:
-                - df: Dataframe com 2 colunas e 1 linha
+                - valor arredondado em 2 casas
     """
-    df_aux = (df1.loc[:, ['Time_taken(min)', 'Festival']]
-             .groupby(['Festival'])
-             .agg({'Time_taken(min)': ['mean', 'std']}))
-    df_aux.columns = ['avg_time', 'std_time']
-    df_aux = df_aux.reset_index()
-    df_aux = np.round(df_aux.loc[df_aux['Festival'] == festival, op], 2)
+    name = '{}_{}'.format(op, 'festival' if festival == 'Yes' else 'no_festival')
 
-    return df_aux
+    return np.round(kpis[name], 2)
 
-def distance(df1, fig):
-    if fig == False:
-        cols = ['Restaurant_latitude', 'Restaurant_longitude', 
-                'Delivery_location_latitude', 'Delivery_location_longitude']
-        df1['distance'] = df1.loc[:, cols].apply(lambda x: 
-                                                 haversine((x['Restaurant_latitude'], x['Restaurant_longitude']), 
-                                                 (x['Delivery_location_latitude'], x['Delivery_location_longitude'])), axis=1)
-        
-        avg_distance = np.round(df1['distance'].mean(), 2)
-        
-        return avg_distance
+@instrumented
+def time_percentiles(df_sketch, by):
+    """
+        Percentis aproximados (p50, p90 e p99) do tempo de entrega, a partir dos sketches de quantis
+    """
+    df_aux = np.round(quantiles(df_sketch, by, 'Time_taken(min)'), 2)
     
-    else:
-        cols = ['Restaurant_latitude', 'Restaurant_longitude', 
-                'Delivery_location_latitude', 'Delivery_location_longitude']
-        df1['distance'] = df1.loc[:, cols].apply(lambda x: 
-                                                 haversine((x['Restaurant_latitude'], x['Restaurant_longitude']), 
-                                                 (x['Delivery_location_latitude'], x['Delivery_location_longitude'])), axis=1)
-        
-        avg_distance = df1.loc[:, ['City','distance']].groupby('City').mean().reset_index()
-        
-        fig = go.Figure(data=[go.Pie(labels=avg_distance['City'], values=avg_distance['distance'], pull=[0, 0.1, 0])])
-        
-        return fig
+    return df_aux
 
-def clean_code(df1):
-    """ 
-        Esta função tem a responsabilidade de limpar o dataframe 
-        Executei a minha limpeza que tem algumas coisas a mais do que a que o professor usou nas aulas
-        
-        Tipos de limpeza:
-        1. Remoção dos dados NaN
-        2. Mudança do tipo da coluna de dados
-        3. Remoção dos espaços das variáveis de texto
-        4. Formatação da coluna de datas
-        5. Limpeza da coluna de tempo (remoção do texto da variável numérica)
-        
-        Input: Dataframe
-        Output: Dataframe
+@instrumented
+def avg_std_time_by_order_type(df_cube):
     """
-    # 1. Excluir linhas com dados NaN
-    linhas_vazias = df1['Delivery_person_Age'] != 'NaN '
-    df1 = df1.loc[linhas_vazias, :]
-    linhas_vazias = df1['multiple_deliveries'] != 'NaN '
-    df1 = df1.loc[linhas_vazias, :]
-    linhas_vazias = df1['Road_traffic_density'] != 'NaN'
-    df1 = df1.loc[linhas_vazias, :]
-    linhas_vazias = df1['City'] != 'NaN'
-    df1 = df1.loc[linhas_vazias, :]
-    linhas_vazias = df1['Festival'] != 'NaN'
-    df1 = df1.loc[linhas_vazias, :]
-    
-    # 2. Converção do tipo de coluna de dados
-    df1['Delivery_person_Age'] = df1['Delivery_person_Age'].astype(int).copy()
-    df1['Delivery_person_Ratings'] = df1['Delivery_person_Ratings'].astype(float)
-    df1['multiple_deliveries'] = df1['multiple_deliveries'].astype(int).copy()
-
-    # 3. Remover os espaços a esquerda e a direita das strings
-    df1.loc[:, 'ID'] = df1.loc[:, 'ID'].str.strip()
-    df1.loc[:, 'Delivery_person_ID'] = df1.loc[:, 'Delivery_person_ID'].str.strip()
-    df1.loc[:, 'Road_traffic_density'] = df1.loc[:, 'Road_traffic_density'].str.strip()
-    df1.loc[:, 'Type_of_order'] = df1.loc[:, 'Type_of_order'].str.strip()
-    df1.loc[:, 'Type_of_vehicle'] = df1.loc[:, 'Type_of_vehicle'].str.strip()
-    df1.loc[:, 'Festival'] = df1.loc[:, 'Festival'].str.strip()
-    df1.loc[:, 'City'] = df1.loc[:, 'City'].str.strip()
+        Tempo médio e desvio padrão do tempo de entrega por cidade e tipo de pedido
+    """
+    df_aux = (rollup(df_cube, ['City', 'Type_of_order'])
+             .loc[:, ['City', 'Type_of_order', 'time_mean', 'time_std']])
+    df_aux.columns = ['City', 'Type_of_order', 'avg_time', 'std_time']
     
-    # 4. Formatação da coluna de datas
-    df1['Order_Date'] = pd.to_datetime(df1['Order_Date'], format='%d-%m-%Y')
+    return df_aux
 
-    # 5. Limpeza da coluna 'Time_taken(min)'
-    df1['Time_taken(min)'] = df1['Time_taken(min)'].apply( lambda x: x.split('(min) ')[1])
-    df1['Time_taken(min)'] = df1['Time_taken(min)'].astype(int)
+@instrumented
+def distance_graph(avg_distance):
+    """
+        Gráfico de pizza com a distância média por cidade
+        Input: Dataframe com as colunas 'City' e 'distance' (ver utils.geo.distance_by_city)
+    """
+    fig = go.Figure(data=[go.Pie(labels=avg_distance['City'], values=avg_distance['distance'], pull=[0, 0.1, 0])])
     
-    return df1
-
-#==================================================
-# Import e limpeza do dataset
-#==================================================
-
-df = pd.read_csv('dataset/train.csv')
-df1 = clean_code(df)
-
-#==================================================
-# Barra Lateral no Streamlit
-#==================================================
-
-st.set_page_config(page_title='Visão Restaurantes', layout='wide')
-
-image = Image.open('logo.png')
-st.sidebar.image(image, width=120)
-
-st.sidebar.markdown('# Curry Company')
-st.sidebar.markdown('## Fastest Delivery in Town')
-st.sidebar.markdown("""___""")
-
-st.sidebar.markdown('## Selecione uma data limite')
-date_slider = st.sidebar.slider(
-    'Até qual valor?',
-    value=pd.datetime(2022, 4, 13),
-    min_value=pd.datetime(2022, 2, 11),
-    max_value=pd.datetime(2022, 4, 6),
-    format='DD-MM-YYYY')
-st.sidebar.markdown("""___""")
-
-traffic_options = st.sidebar.multiselect(
-    'Quais as condições do trânsito?',
-    ['Low', 'Medium', 'High', 'Jam'],
-    default=['Low', 'Medium', 'High', 'Jam'])
-st.sidebar.markdown("""___""")
-st.sidebar.markdown('### Powered by Comunidade DS')
-
-# Filtro de data
-linhas_selecionadas = df1['Order_Date'] < date_slider
-df1 = df1.loc[linhas_selecionadas, :]
-
-# Filtro de trânsito
-linhas_selecionadas = df1['Road_traffic_density'].isin(traffic_options)
-df1 = df1.loc[linhas_selecionadas, :]
-
-#===================================================
-# Layout no Streamlit
-#===================================================
-st.header('Marketplace - Visão Restaurantes')
+    return fig
 
-tab1, tab2, tab3 = st.tabs(['Visão Gerencial', '-', '-'])
+def management_panel(df_cube, df_sketch, kpis, date_slider, traffic_options):
+    """
+        Tab1: Visão Gerencial (gráficos e tabelas calculados em paralelo, ver utils.scheduler;
+        as métricas gerais já vêm calculadas de uma vez pelo utils.kpis)
+    """
+    scheduler = PanelScheduler()
 
-with tab1:
     with st.container(): # Primeiro Container: métricas gerais
         st.markdown('### Overall Metrics')
         
         col1, col2, col3, col4, col5, col6 = st.columns(6)
         
         with col1:
-            delivery_unique = len(df1.loc[:, 'Delivery_person_ID'].unique())
-            col1.metric('Qtde. Entregadores', delivery_unique)
+            col1.metric('Qtde. Entregadores', kpis['delivery_unique'])
         
         with col2:
-            avg_distance = distance(df1, fig=False)
+            avg_distance = np.round(float(kpis['avg_distance']), 2)
             col2.metric('Distância média entregas', avg_distance)
                              
         with col3:
-            df_aux = avg_std_time_delivery(df1, 'Yes', 'avg_time')
+            df_aux = avg_std_time_delivery(kpis, 'Yes', 'avg_time')
             col3.metric('AVG entrega c/ Festival', df_aux)
         
         with col4:
-            df_aux = avg_std_time_delivery(df1, 'Yes', 'std_time')
+            df_aux = avg_std_time_delivery(kpis, 'Yes', 'std_time')
             col4.metric('STD entrega c/ Festival', df_aux)
         
         with col5:
-            df_aux = avg_std_time_delivery(df1, 'No', 'avg_time')
+            df_aux = avg_std_time_delivery(kpis, 'No', 'avg_time')
             col5.metric('AVG entrega s/ Festival', df_aux)
         
         with col6:
-            df_aux = avg_std_time_delivery(df1, 'No', 'std_time')
+            df_aux = avg_std_time_delivery(kpis, 'No', 'std_time')
             col6.metric('STD entrega s/ Festival', df_aux)
             
     with st.container(): # Segundo Container com um gráfico e um dataframe  
@@ -224,19 +141,11 @@ with tab1:
         
         with col1:
             st.markdown('#### Gráfico')
-            fig = avg_std_time_graph(df1)
-            st.plotly_chart(fig)
+            scheduler.submit(figure_cache.get, 'avg_std_time_graph', date_slider, traffic_options, render=plotly_chart)
             
         with col2:
             st.markdown('#### DataFrame')
-            
-            df_aux = (df1.loc[:, ['City', 'Type_of_order', 'Time_taken(min)']]
-                     .groupby(['City', 'Type_of_order'])
-                     .agg({'Time_taken(min)': ['mean', 'std']}))
-            df_aux.columns = ['avg_time', 'std_time']
-            df_aux = df_aux.reset_index()
-            
-            st.dataframe(df_aux)
+            scheduler.submit(avg_std_time_by_order_type, df_cube, render=dataframe)
         
     with st.container(): # Terceiro Container com duas pizzas
         st.markdown("""___""")
@@ -246,10 +155,66 @@ with tab1:
 
         with col1:
             st.markdown('#### Pizza 1')
-            fig = distance(df1, fig=True)
-            st.plotly_chart(fig)
+            scheduler.submit(lambda: distance_graph(distance_by_city(date_slider, traffic_options)), render=plotly_chart)
   
         with col2:
             st.markdown('#### Pizza 2')
-            fig = avg_std_time_on_traffic(df1)
-            st.plotly_chart(fig)
\ No newline at end of file
+            scheduler.submit(figure_cache.get, 'avg_std_time_on_traffic', date_slider, traffic_options, render=plotly_chart)
+            
+    with st.container(): # Quarto Container com os percentis do tempo de entrega
+        st.markdown("""___""")
+        st.markdown('### Percentis do tempo de entrega')
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            st.markdown('#### Por cidade')
+            scheduler.submit(time_percentiles, df_sketch, ['City'], render=dataframe)
+        
+        with col2:
+            st.markdown('#### Por cidade e trânsito')
+            scheduler.submit(time_percentiles, df_sketch, ['City', 'Road_traffic_density'], render=dataframe)
+
+    scheduler.run()
+
+#==================================================
+# Import e limpeza do dataset
+#==================================================
+
+start_run('visao_restaurantes')
+
+with step('load'):
+    cube_filter = load_cube_filter()
+    sketch_filter = load_sketch_filter()
+    kpi_engine = load_kpi_engine()
+
+figure_cache = load_figure_cache()
+figure_cache.register('avg_std_time_graph', avg_std_time_graph, cube_filter)
+figure_cache.register('avg_std_time_on_traffic', avg_std_time_on_traffic, cube_filter)
+figure_cache.start_warm_up(['avg_std_time_graph', 'avg_std_time_on_traffic'])
+
+#==================================================
+# Barra Lateral no Streamlit
+#==================================================
+
+st.set_page_config(page_title='Visão Restaurantes', layout='wide')
+
+date_slider, traffic_options = sidebar_filters()
+
+# Filtros de data e de trânsito (no cubo de métricas e nos sketches)
+with step('filter') as filter_step:
+    df_cube = cube_filter.filter(date_slider, traffic_options)
+    df_sketch = sketch_filter.filter(date_slider, traffic_options)
+    kpis = kpi_engine.get(date_slider, traffic_options)
+    filter_step.rows = len(df_cube)
+
+#===================================================
+# Layout no Streamlit
+#===================================================
+st.header('Marketplace - Visão Restaurantes')
+
+tabs = DeferredTabs(['Visão Gerencial', '-', '-'], key='tab_visao_restaurantes')
+tabs.panel('Visão Gerencial', management_panel, df_cube, df_sketch, kpis, date_slider, traffic_options)
+tabs.render()
+
+finish_run()
@@ -0,0 +1,3 @@
+"""
+    Módulos compartilhados entre as páginas do dashboard da Curry Company
+"""
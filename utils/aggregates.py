@@ -0,0 +1,81 @@
+#==================================================
+# Import das Bibliotecas
+#==================================================
+
+import os
+import pickle
+
+import streamlit as st
+
+from utils.data import DATASET_PATH, PRECOMPUTED_ONLY, file_signature, load_snapshot
+from utils.stream import StreamAggregates
+
+#==================================================
+# Configurações
+#==================================================
+
+# Versão do formato dos agregados: mudar sempre que StreamAggregates ganhar ou mudar campos
+AGGREGATES_VERSION = '6'
+
+#==================================================
+# Funções
+#==================================================
+def aggregates_path(path):
+    """
+        Caminho dos agregados persistidos, ao lado do csv
+        (ex.: dataset/train.csv -> dataset/train.aggregates.pkl)
+    """
+    return os.path.splitext(path)[0] + '.aggregates.pkl'
+
+def save_aggregates(aggregates, path=DATASET_PATH):
+    """
+        Grava os agregados (StreamAggregates) de forma atômica, como o snapshot
+    """
+    out_path = aggregates_path(path)
+    tmp_path = out_path + '.tmp-{}'.format(os.getpid())
+    with open(tmp_path, 'wb') as f:
+        pickle.dump({'version': AGGREGATES_VERSION, 'aggregates': aggregates}, f)
+    os.replace(tmp_path, out_path)
+
+def load_aggregates(path=DATASET_PATH):
+    """
+        Carrega os agregados persistidos. Quando não existem, são de outra versão
+        do formato ou são mais antigos que o csv, são reconstruídos a partir do snapshot.
+        
+        Input: caminho do csv
+        Output: StreamAggregates
+    """
+    out_path = aggregates_path(path)
+    if os.path.exists(out_path) and os.stat(out_path).st_mtime_ns >= os.stat(path).st_mtime_ns:
+        with open(out_path, 'rb') as f:
+            stored = pickle.load(f)
+        if stored['version'] == AGGREGATES_VERSION:
+            return stored['aggregates']
+    if PRECOMPUTED_ONLY:
+        raise FileNotFoundError('Agregados {} ausentes ou desatualizados: rode python -m utils.precompute {}'.format(out_path, path))
+
+    aggregates = StreamAggregates().update(load_snapshot(path))
+    save_aggregates(aggregates, path)
+    return aggregates
+
+@st.cache_resource(max_entries=1, show_spinner=False)
+def _load_cube(path, signature):
+    return load_aggregates(path).cube
+
+def load_cube(path=DATASET_PATH):
+    """
+        Cubo de métricas do dataset, carregado uma vez por processo e por versão do csv.
+        Deve ser filtrado com utils.filters.load_cube_filter, como as linhas dos pedidos.
+    """
+    return _load_cube(path, file_signature(path))
+
+@st.cache_resource(max_entries=1, show_spinner=False)
+def _load_sketches(path, signature):
+    return load_aggregates(path).sketches
+
+def load_sketches(path=DATASET_PATH):
+    """
+        Sketches de quantis do dataset (ver utils.sketches), carregados uma vez por processo
+        e por versão do csv. Devem ser filtrados com utils.filters.load_sketch_filter.
+    """
+    return _load_sketches(path, file_signature(path))
@@ -0,0 +1,89 @@
+#==================================================
+# Import das Bibliotecas
+#==================================================
+
+import argparse
+import time
+
+import pandas as pd
+
+from utils.aggregates import load_aggregates, save_aggregates
+from utils.data import (DATASET_PATH, add_distance, clean_code, concat_snapshots,
+                        load_snapshot, snapshot_path, to_snapshot_dtypes, write_snapshot)
+from utils.precompute import build_views, read_artifacts, save_artifacts
+from utils.sqlstore import append_database, database_is_fresh
+from utils.stream import RAW_DTYPES
+
+#==================================================
+# Funções
+#==================================================
+def read_header(path):
+    with open(path, encoding='utf-8') as f:
+        return f.readline().rstrip('\r\n')
+
+def append_orders(batch_path, path=DATASET_PATH):
+    """
+        Adiciona um lote de novos pedidos (csv bruto, mesmo cabeçalho do dataset)
+        sem reprocessar o histórico:
+        
+        1. Limpa apenas as linhas do lote
+        2. Atualiza os agregados persistidos (cubo, momentos por entregador,
+           pedidos e entregadores únicos por semana) com merge incremental
+        3. Acrescenta as linhas brutas ao csv, que continua sendo a fonte dos dados
+        4. Regrava o snapshot com as novas linhas (sem reler nem limpar o csv)
+        5. Insere as linhas limpas no banco SQLite (utils.sqlstore), quando ele existe e está em dia
+        6. Recalcula as visões pré-calculadas (utils.precompute) das mesmas datas limite,
+           quando elas existem e estão em dia
+        
+        O snapshot, os agregados, o banco e as visões são gravados depois do csv, então
+        continuam válidos (também com CURRY_PRECOMPUTED_ONLY=1) e as páginas passam a
+        mostrar os novos pedidos no próximo rerun. Banco ou visões que já estavam
+        desatualizados ficam como estão e são reconstruídos como antes.
+        
+        Input: caminho do csv do lote e do dataset
+        Output: quantidade de pedidos limpos adicionados
+    """
+    if read_header(batch_path) != read_header(path):
+        raise ValueError('O cabeçalho de {} é diferente do cabeçalho de {}'.format(batch_path, path))
+
+    df_new = add_distance(to_snapshot_dtypes(clean_code(pd.read_csv(batch_path, dtype=RAW_DTYPES))))
+    df1 = load_snapshot(path)
+    aggregates = load_aggregates(path).update(df_new)
+    # Estado do banco e das visões antes do csv mudar
+    update_database = database_is_fresh(path)
+    view_dates = sorted({date_limit for date_limit, _ in read_artifacts(path).views})
+
+    # Linhas brutas do lote, sem o cabeçalho
+    with open(batch_path, encoding='utf-8') as f:
+        f.readline()
+        lines = f.read()
+    if lines:
+        with open(path, 'a+', encoding='utf-8') as f:
+            f.seek(0, 2)
+            if f.tell() > 0:
+                f.seek(f.tell() - 1)
+                if f.read(1) != '\n':
+                    f.write('\n')
+            f.write(lines if lines.endswith('\n') else lines + '\n')
+
+    write_snapshot(concat_snapshots([df1, df_new]), snapshot_path(path))
+    save_aggregates(aggregates, path)
+    if update_database:
+        append_database(df_new, path)
+    if view_dates:
+        save_artifacts(build_views(path, view_dates), path)
+    return len(df_new)
+
+#==================================================
+# Execução
+#==================================================
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Adiciona um lote de novos pedidos ao dataset.')
+    parser.add_argument('batch', help='csv bruto com os novos pedidos')
+    parser.add_argument('--csv', default=DATASET_PATH, help='csv do dataset')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    rows = append_orders(args.batch, args.csv)
+    print('{} pedidos adicionados em {:.2f}s'.format(rows, time.perf_counter() - start))
@@ -0,0 +1,73 @@
+#==================================================
+# Import das Bibliotecas
+#==================================================
+
+import datetime
+
+import streamlit as st
+
+from utils.lazy import lazy_import
+
+# O Home usa só o cabeçalho: o PIL e os filtros (pandas, pyarrow) são importados no primeiro uso
+Image = lazy_import('PIL.Image')
+filters = lazy_import('utils.filters')
+
+#==================================================
+# Configurações
+#==================================================
+
+LOGO_PATH = 'logo.png'
+
+# Intervalo de datas do slider da barra lateral
+DATE_MIN = datetime.datetime(2022, 2, 11)
+DATE_MAX = datetime.datetime(2022, 4, 6)
+
+#==================================================
+# Funções
+#==================================================
+@st.cache_resource(show_spinner=False)
+def load_logo(path=LOGO_PATH):
+    """
+        Logo decodificado uma única vez por processo
+        (a imagem é compartilhada entre as sessões e não deve ser alterada)
+    """
+    image = Image.open(path)
+    image.load()
+    return image
+
+def sidebar_header():
+    """
+        Cabeçalho da barra lateral comum a todas as páginas: logo e nome da empresa
+    """
+    st.sidebar.image(load_logo(), width=120)
+
+    st.sidebar.markdown('# Curry Company')
+    st.sidebar.markdown('## Fastest Delivery in Town')
+    st.sidebar.markdown("""___""")
+
+def sidebar_filters():
+    """
+        Barra lateral das páginas de visão: cabeçalho e filtros de data limite e de
+        condições do trânsito (padrões de utils.filters, os mesmos do pré-cálculo)
+
+        Output: (data limite, lista de condições do trânsito)
+    """
+    sidebar_header()
+
+    st.sidebar.markdown('## Selecione uma data limite')
+    date_slider = st.sidebar.slider(
+        'Até qual valor?',
+        value=filters.DEFAULT_DATE_LIMIT,
+        min_value=DATE_MIN,
+        max_value=DATE_MAX,
+        format='DD-MM-YYYY')
+    st.sidebar.markdown("""___""")
+
+    traffic_options = st.sidebar.multiselect(
+        'Quais as condições do trânsito?',
+        filters.TRAFFIC_OPTIONS,
+        default=filters.TRAFFIC_OPTIONS)
+    st.sidebar.markdown("""___""")
+    st.sidebar.markdown('### Powered by Comunidade DS')
+
+    return date_slider, traffic_options
@@ -0,0 +1,86 @@
+#==================================================
+# Import das Bibliotecas
+#==================================================
+
+import pickle
+import threading
+from collections import OrderedDict
+
+#==================================================
+# Funções
+#==================================================
+def pickled_size(value):
+    """
+        Tamanho aproximado (bytes) de um valor, medido pelo pickle
+    """
+    return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+
+#==================================================
+# Classes
+#==================================================
+class LRUCache:
+    """
+        Cache LRU limitado por quantidade de entradas e por memória (bytes).
+        
+        Ao passar de qualquer um dos limites as entradas usadas há mais tempo são
+        descartadas. É compartilhado entre as sessões (threads) do Streamlit,
+        então todas as operações são protegidas por um lock.
+        
+        Input: máximo de entradas, máximo de bytes (None = sem limite) e função
+               que mede o tamanho de cada valor
+    """
+    def __init__(self, max_entries=128, max_bytes=None, sizeof=pickled_size):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return self._entries[key][0]
+
+    def put(self, key, value):
+        size = self.sizeof(value)
+        with self._lock:
+            if key in self._entries:
+                self.nbytes -= self._entries.pop(key)[1]
+            # Um valor maior que o limite de memória não é guardado
+            if self.max_bytes is not None and size > self.max_bytes:
+                return
+            self._entries[key] = (value, size)
+            self.nbytes += size
+            while (len(self._entries) > self.max_entries
+                   or (self.max_bytes is not None and self.nbytes > self.max_bytes)):
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.nbytes -= evicted_size
+
+    def get_or_compute(self, key, func):
+        """
+            Retorna o valor em cache ou calcula func() e guarda o resultado
+        """
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = func()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
@@ -0,0 +1,73 @@
+#==================================================
+# Import das Bibliotecas
+#==================================================
+
+import numpy as np
+
+from utils.data import to_float64
+
+#==================================================
+# Configurações
+#==================================================
+
+# Dimensões do cubo (granularidade de dia)
+CUBE_DIMENSIONS = ['Order_Date', 'Road_traffic_density', 'City', 'Festival',
+                   'Type_of_order', 'Weatherconditions']
+
+# Medidas agregadas em cada célula e o prefixo das suas colunas no cubo
+CUBE_MEASURES = {'Time_taken(min)': 'time', 'Delivery_person_Ratings': 'rating'}
+
+# Colunas somáveis de cada célula: pedidos e, por medida, contagem, soma e soma dos quadrados
+MOMENT_COLUMNS = ['orders'] + ['{}_{}'.format(name, moment)
+                               for name in CUBE_MEASURES.values()
+                               for moment in ('count', 'sum', 'sumsq')]
+
+#==================================================
+# Funções
+#==================================================
+def build_cube(df1):
+    """
+        Constrói o cubo de métricas: uma linha por combinação observada das
+        dimensões, com a quantidade de pedidos e, para o tempo de entrega e a
+        avaliação, contagem (sem NaN), soma e soma dos quadrados.
+        Como essas colunas são somáveis, qualquer recorte dos filtros é
+        respondido somando células, e média e desvio padrão são reconstruídos
+        exatamente (ver rollup).
+        
+        Input: Dataframe limpo (linhas dos pedidos)
+        Output: Dataframe do cubo
+    """
+    df_aux = df1.loc[:, CUBE_DIMENSIONS + list(CUBE_MEASURES)]
+    aggs = {'orders': ('Time_taken(min)', 'size')}
+    for col, name in CUBE_MEASURES.items():
+        values = to_float64(df_aux[col])
+        df_aux = df_aux.assign(**{col: values, name + '_sq': values ** 2})
+        aggs[name + '_count'] = (col, 'count')
+        aggs[name + '_sum'] = (col, 'sum')
+        aggs[name + '_sumsq'] = (name + '_sq', 'sum')
+
+    return df_aux.groupby(CUBE_DIMENSIONS, observed=True).agg(**aggs).reset_index()
+
+def rollup(df_cube, by):
+    """
+        Soma as células do cubo (já filtrado) agrupando pelas dimensões em by e
+        reconstrói média e desvio padrão amostral (ddof=1, como no pandas) de cada medida:
+            média = soma / n
+            variância = (soma dos quadrados - soma * média) / (n - 1)
+        
+        Input: cubo filtrado e lista de dimensões
+        Output: Dataframe com as dimensões, as colunas somadas e
+                '<medida>_mean' / '<medida>_std' (ex.: 'time_mean', 'rating_std')
+    """
+    df_aux = (df_cube.loc[:, by + MOMENT_COLUMNS]
+                     .groupby(by, observed=True)
+                     .sum()
+                     .reset_index())
+    for name in CUBE_MEASURES.values():
+        n = df_aux[name + '_count']
+        total = df_aux[name + '_sum']
+        mean = total / n
+        var = (df_aux[name + '_sumsq'] - total * mean) / (n - 1)
+        df_aux[name + '_mean'] = mean.where(n > 0)
+        df_aux[name + '_std'] = np.sqrt(var.clip(lower=0)).where(n > 1)
+    return df_aux
@@ -0,0 +1,314 @@
+#==================================================
+# Import das Bibliotecas
+#==================================================
+
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+import streamlit as st
+
+from utils.instrument import step
+from utils.lazy import lazy_import
+
+# Só usado ao construir o snapshot
+haversine = lazy_import('haversine')
+
+#==================================================
+# Configurações
+#==================================================
+
+DATASET_PATH = os.path.join('dataset', 'train.csv')
+
+# Valores que marcam dados ausentes no csv bruto, por coluna
+NAN_SENTINELS = {'Delivery_person_Age': 'NaN ', 'multiple_deliveries': 'NaN ',
+                 'Road_traffic_density': 'NaN', 'City': 'NaN', 'Festival': 'NaN'}
+
+# Colunas de texto que chegam com espaços sobrando no csv bruto (além do 'ID')
+STRIP_COLUMNS = ['Delivery_person_ID', 'Road_traffic_density', 'Type_of_order',
+                 'Type_of_vehicle', 'Festival', 'City']
+
+# Versão do formato do snapshot: mudar sempre que as colunas ou tipos gravados mudarem
+SNAPSHOT_VERSION = '6'
+
+# Com CURRY_PRECOMPUTED_ONLY=1 as páginas só abrem artefatos já gerados (python -m utils.precompute)
+# e nunca reconstroem o snapshot ou os agregados durante um rerun
+PRECOMPUTED_ONLY = os.environ.get('CURRY_PRECOMPUTED_ONLY', '0') == '1'
+
+# Colunas de coordenadas (restaurante e local de entrega) usadas no cálculo da distância
+LOCATION_COLUMNS = ['Restaurant_latitude', 'Restaurant_longitude',
+                    'Delivery_location_latitude', 'Delivery_location_longitude']
+
+# Colunas de texto com poucos valores distintos, armazenadas como categóricas no snapshot
+# (códigos inteiros + tabela de valores; o 'Delivery_person_ID' tem ~1.300 valores para ~45 mil pedidos)
+CATEGORICAL_COLUMNS = ['City', 'Road_traffic_density', 'Type_of_order',
+                       'Type_of_vehicle', 'Festival', 'Weatherconditions',
+                       'Delivery_person_ID', 'Time_Orderd', 'Time_Order_picked']
+
+# Tipos numéricos compactos do snapshot (idades, condições e tempos cabem em int8/int16;
+# avaliações e coordenadas em float32, ~7 dígitos significativos; ver to_float64)
+COMPACT_DTYPES = {'Delivery_person_Age': 'int8', 'Vehicle_condition': 'int8',
+                  'multiple_deliveries': 'int8', 'Time_taken(min)': 'int16',
+                  'Delivery_person_Ratings': 'float32',
+                  **{col: 'float32' for col in LOCATION_COLUMNS}}
+
+# Colunas das linhas dos pedidos que cada página lê (direto ou pelos módulos de utils que usa).
+# As páginas compartilham um único dataframe em memória com a união dessas colunas;
+# as demais ficam apenas no snapshot (usadas pelos agregados e pelo csv incremental).
+ORDER_COLUMNS_BY_PAGE = {
+    'filtros': ['Order_Date', 'Road_traffic_density'],
+    'visao_empresa': ['Delivery_person_ID', 'City'] + LOCATION_COLUMNS,
+    'visao_entregadores': ['Delivery_person_ID', 'Delivery_person_Ratings', 'City', 'Time_taken(min)',
+                           'Delivery_person_Age', 'Vehicle_condition'],
+    'visao_restaurantes': ['Delivery_person_ID', 'City', 'Festival', 'Time_taken(min)', 'distance'],
+}
+ORDER_COLUMNS = list(dict.fromkeys(col for cols in ORDER_COLUMNS_BY_PAGE.values() for col in cols))
+
+#==================================================
+# Funções
+#==================================================
+def _map_unique(series, func):
+    """
+        Aplica func apenas sobre os valores distintos da série e distribui o
+        resultado para as linhas através dos códigos do factorize.
+        Nas colunas de texto do dataset há poucos valores distintos
+        (cidades, datas, '(min) N'...), então cada texto é tratado uma única vez.
+    """
+    codes, uniques = pd.factorize(series, use_na_sentinel=False)
+    values = np.asarray(func(pd.Series(uniques, dtype=object)))
+    return pd.Series(values.take(codes), index=series.index, name=series.name)
+
+def clean_code(df1):
+    """ 
+        Esta função tem a responsabilidade de limpar o dataframe 
+        Executei a minha limpeza que tem algumas coisas a mais do que a que o professor usou nas aulas
+        
+        Tipos de limpeza:
+        1. Remoção dos dados NaN
+        2. Mudança do tipo da coluna de dados
+        3. Remoção dos espaços das variáveis de texto
+        4. Formatação da coluna de datas
+        5. Limpeza da coluna de tempo (remoção do texto da variável numérica)
+        
+        As linhas são filtradas uma única vez (máscara combinada) e todas as
+        conversões são vetorizadas e aplicadas sobre os valores distintos,
+        montando o dataframe final com uma única cópia (assign).
+        
+        Input: Dataframe
+        Output: Dataframe
+    """
+    # 1. Excluir linhas com dados NaN
+    linhas_validas = np.ones(len(df1), dtype=bool)
+    for col, sentinel in NAN_SENTINELS.items():
+        linhas_validas &= (df1[col] != sentinel).to_numpy()
+    df1 = df1.loc[linhas_validas, :]
+    
+    colunas = {}
+    
+    # 2. Converção do tipo de coluna de dados
+    colunas['Delivery_person_Age'] = _map_unique(df1['Delivery_person_Age'], lambda v: v.astype(int))
+    colunas['Delivery_person_Ratings'] = _map_unique(df1['Delivery_person_Ratings'], lambda v: v.astype(float))
+    colunas['multiple_deliveries'] = _map_unique(df1['multiple_deliveries'], lambda v: v.astype(int))
+
+    # 3. Remover os espaços a esquerda e a direita das strings
+    colunas['ID'] = df1['ID'].str.strip() # único por linha, o factorize não compensa
+    for col in STRIP_COLUMNS:
+        colunas[col] = _map_unique(df1[col], lambda v: v.str.strip())
+    
+    # 4. Formatação da coluna de datas
+    colunas['Order_Date'] = _map_unique(df1['Order_Date'], lambda v: pd.to_datetime(v, format='%d-%m-%Y'))
+
+    # 5. Limpeza da coluna 'Time_taken(min)'
+    colunas['Time_taken(min)'] = _map_unique(df1['Time_taken(min)'],
+                                             lambda v: v.str.split('(min) ', n=1, regex=False).str[1].astype(int))
+    
+    return df1.assign(**colunas)
+
+def add_distance(df1):
+    """
+        Adiciona a coluna 'distance' (km, float32) com a distância haversine entre
+        o restaurante e o local de entrega, calculada de uma vez com arrays do numpy.
+        
+        Input: Dataframe limpo
+        Output: Dataframe com a coluna 'distance'
+    """
+    if len(df1) == 0: # o haversine_vector falha com arrays vazios
+        return df1.assign(distance=np.empty(0, dtype='float32'))
+    coords = df1.loc[:, LOCATION_COLUMNS].to_numpy(dtype='float64')
+    distance = haversine.haversine_vector(coords[:, 0:2], coords[:, 2:4])
+    return df1.assign(distance=distance.astype('float32'))
+
+def to_float64(values, decimals=6):
+    """
+        Converte uma coluna compacta (ex.: avaliações em float32) para float64 com o valor
+        decimal do csv, para médias e somas: a conversão direta traria o erro do float32
+        (4.9 vira 4.900000095...). O float32 guarda ~7 dígitos significativos, então para
+        valores abaixo de 10 arredondar em 6 casas recupera o valor lido do csv.
+        
+        Input: Series ou array numérico
+        Output: mesmo tipo, em float64
+    """
+    return values.astype('float64').round(decimals)
+
+def file_signature(path):
+    """
+        Retorna a assinatura (mtime em ns, tamanho em bytes) do arquivo.
+        Qualquer alteração no arquivo muda a assinatura e invalida o cache.
+    """
+    stat = os.stat(path)
+    return (stat.st_mtime_ns, stat.st_size)
+
+def snapshot_path(path):
+    """
+        Caminho do snapshot colunar do dataset limpo, ao lado do csv
+        (ex.: dataset/train.csv -> dataset/train.feather)
+    """
+    return os.path.splitext(path)[0] + '.feather'
+
+def to_snapshot_dtypes(df1):
+    """
+        Converte o dataframe limpo para os tipos do snapshot: as linhas são ordenadas
+        por 'Order_Date' (para os filtros indexados de utils.filters), colunas de texto
+        de baixa cardinalidade viram categóricas, os números usam os tipos de
+        COMPACT_DTYPES e o índice é descartado.
+        As categorias são ordenadas (ordem alfabética) para que os groupby com
+        observed=True devolvam os grupos na mesma ordem das colunas de texto.
+        
+        Input: Dataframe limpo
+        Output: Dataframe tipado
+    """
+    df1 = df1.sort_values('Order_Date', kind='stable', ignore_index=True).astype(COMPACT_DTYPES)
+    for col in CATEGORICAL_COLUMNS:
+        df1[col] = df1[col].astype('category').cat.as_ordered()
+    return df1
+
+def concat_snapshots(frames):
+    """
+        Concatena dataframes no formato do snapshot, unindo as categorias de cada
+        coluna categórica e mantendo a ordenação por 'Order_Date'.
+        
+        Input: lista de Dataframes tipados
+        Output: Dataframe tipado
+    """
+    for col in CATEGORICAL_COLUMNS:
+        categories = sorted(set().union(*(df[col].cat.categories for df in frames)))
+        frames = [df.assign(**{col: df[col].cat.set_categories(categories)}) for df in frames]
+    return pd.concat(frames, ignore_index=True).sort_values('Order_Date', kind='stable', ignore_index=True)
+
+def write_snapshot(df1, path):
+    """
+        Grava o snapshot em Feather (Arrow IPC) sem compressão, para permitir leitura via mmap.
+        A escrita é feita em um arquivo temporário e depois renomeada, então
+        outros processos nunca leem um snapshot pela metade.
+    """
+    table = pa.Table.from_pandas(df1, preserve_index=False)
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), b'snapshot_version': SNAPSHOT_VERSION.encode()})
+    tmp_path = path + '.tmp-{}'.format(os.getpid())
+    feather.write_feather(table, tmp_path, compression='uncompressed')
+    os.replace(tmp_path, path)
+
+def read_snapshot(path, columns=None):
+    """
+        Lê o snapshot através de memory map. As colunas numéricas e de datas
+        apontam direto para as páginas do arquivo (zero-copy, somente leitura),
+        que ficam compartilhadas entre os processos pelo cache do sistema operacional.
+        Só as colunas em columns são lidas (todas quando None).
+        Retorna None quando o snapshot foi gravado por outra versão do formato.
+    """
+    table = feather.read_table(path, columns=columns, memory_map=True)
+    if (table.schema.metadata or {}).get(b'snapshot_version') != SNAPSHOT_VERSION.encode():
+        return None
+    return table.to_pandas(split_blocks=True)
+
+def build_snapshot(path=DATASET_PATH):
+    """
+        Lê o csv, limpa, calcula as distâncias e grava o snapshot ao lado dele.
+        
+        Input: caminho do csv
+        Output: caminho do snapshot gerado
+    """
+    with step('read_csv') as read_step:
+        df1 = pd.read_csv(path)
+        read_step.rows = len(df1)
+    with step('clean_code', rows=len(df1)):
+        df1 = clean_code(df1)
+    with step('add_distance', rows=len(df1)):
+        df1 = add_distance(to_snapshot_dtypes(df1))
+    out_path = snapshot_path(path)
+    write_snapshot(df1, out_path)
+    return out_path
+
+def load_snapshot(path=DATASET_PATH, columns=None):
+    """
+        Carrega o dataset limpo (só as colunas em columns, todas quando None)
+        a partir do snapshot, reconstruindo-o apenas quando ele não existe,
+        quando o csv é mais novo ou quando foi gravado por outra versão do formato.
+    """
+    out_path = snapshot_path(path)
+    if os.path.exists(out_path) and os.stat(out_path).st_mtime_ns >= os.stat(path).st_mtime_ns:
+        df1 = read_snapshot(out_path, columns)
+        if df1 is not None:
+            return df1
+    if PRECOMPUTED_ONLY:
+        raise FileNotFoundError('Snapshot {} ausente ou desatualizado: rode python -m utils.precompute {}'.format(out_path, path))
+    build_snapshot(path)
+    return read_snapshot(out_path, columns)
+
+@st.cache_resource(max_entries=1, show_spinner=False)
+def _load_cleaned(path, signature):
+    """
+        Carrega o dataset limpo (colunas de ORDER_COLUMNS) uma única vez por processo.
+        O objeto retornado é compartilhado entre todas as sessões e reruns,
+        então as páginas nunca devem alterá-lo (os filtros criam cópias).
+        O parâmetro signature só existe para compor a chave do cache.
+    """
+    return load_snapshot(path, ORDER_COLUMNS)
+
+def load_data(path=DATASET_PATH):
+    """
+        Ponto de entrada único das páginas para obter o dataframe limpo.
+        
+        Input: caminho do csv (padrão: dataset/train.csv)
+        Output: Dataframe limpo, compartilhado entre sessões
+    """
+    return _load_cleaned(path, file_signature(path))
+
+def bytes_per_order(df1):
+    """
+        Memória ocupada pelo dataframe (incluindo os textos) dividida pela quantidade de pedidos
+    """
+    return df1.memory_usage(deep=True).sum() / max(len(df1), 1)
+
+def freeze(df1):
+    """
+        Marca como somente leitura (in-place) os arrays numéricos das colunas e retorna df1:
+        números, datas e os códigos das categóricas.
+        
+        Usado nos dataframes compartilhados entre as sessões (ver utils.filters.OrderFilter):
+        uma escrita nesses dados (df1.loc[...] = ..., operações in-place) levanta ValueError em vez
+        de alterar o dataset de todas as sessões. Views (recortes com iloc) herdam a proteção; cópias não.
+        A proteção só vale enquanto o pandas não consolidar df1 (take, iloc com array de
+        posições, .values), o que troca os blocos por cópias graváveis: o dataframe
+        compartilhado só deve ser lido coluna a coluna ou recortado com slices.
+        Colunas de texto (object) ficam graváveis: no pandas 1.5 as comparações de arrays
+        object somente leitura falham ("buffer source array is read-only").
+    """
+    # O pandas 1.5 não tem API pública para isso: os arrays ficam nos blocos do BlockManager
+    # (Categorical e DatetimeArray guardam os códigos/valores em um ndarray interno)
+    for values in df1._mgr.arrays:
+        array = getattr(values, '_ndarray', values)
+        if isinstance(array, np.ndarray) and array.dtype.kind in 'biufmM':
+            array.flags.writeable = False
+    return df1
+
+def is_frozen(df1):
+    """
+        True quando todos os arrays numéricos das colunas de df1 estão somente leitura (ver freeze)
+    """
+    for values in df1._mgr.arrays:
+        array = getattr(values, '_ndarray', values)
+        if isinstance(array, np.ndarray) and array.dtype.kind in 'biufmM' and array.flags.writeable:
+            return False
+    return True
@@ -0,0 +1,157 @@
+#==================================================
+# Import das Bibliotecas
+#==================================================
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.data import DATASET_PATH, file_signature
+from utils.filters import load_order_filter
+from utils.sqlstore import SQL_BACKEND, load_store
+
+#==================================================
+# Configurações
+#==================================================
+
+# Granularidades dos períodos (colunas de chave da dimensão de calendário)
+GRANULARITIES = ['day', 'week', 'month']
+
+#==================================================
+# Classes
+#==================================================
+class Calendar:
+    """
+        Dimensão de calendário: uma linha por data distinta de 'Order_Date', em ordem,
+        com chaves inteiras calculadas uma única vez (sem strftime):
+
+        - day: dias desde 1970-01-01
+        - week: semanas desde 1969-12-28, começando no domingo (mesmo critério do '%U')
+        - month: meses desde 1970-01
+        - weekday: dia da semana (segunda = 0, como o pandas)
+        - week_of_year: semana do ano, com o mesmo número do strftime('%U')
+
+        As chaves seguem a ordem das datas e não se repetem entre anos, então
+        re-agregar um período é um bincount sobre as chaves.
+
+        Input: datas dos pedidos (quaisquer, com repetições)
+    """
+    def __init__(self, dates):
+        dates = pd.DatetimeIndex(np.unique(np.asarray(dates, dtype='datetime64[D]')))
+        day = dates.to_numpy().astype('datetime64[D]').astype('int64')
+        # 1970-01-01 foi uma quinta-feira
+        weekday = (day + 3) % 7
+        days_since_new_year = day - dates.to_numpy().astype('datetime64[Y]').astype('datetime64[D]').astype('int64')
+        sunday_first_weekday = (weekday + 1) % 7
+
+        self.dates = dates.to_numpy()
+        self.table = pd.DataFrame({
+            'date': dates,
+            'day': day.astype('int32'),
+            'week': ((day + 4) // 7).astype('int32'),
+            'month': dates.to_numpy().astype('datetime64[M]').astype('int64').astype('int32'),
+            'weekday': weekday.astype('int8'),
+            'week_of_year': ((days_since_new_year + 7 - sunday_first_weekday) // 7).astype('int8'),
+        })
+
+    def codes(self, dates):
+        """
+            Posição de cada data na tabela do calendário (busca binária, sem formatar as datas)
+        """
+        return self.dates.searchsorted(np.asarray(dates, dtype='datetime64[ns]'), side='right') - 1
+
+    def keys(self, granularity, codes):
+        """
+            Chave inteira do período (granularity em GRANULARITIES) de cada posição do calendário
+        """
+        return self.table[granularity].to_numpy()[codes]
+
+    @staticmethod
+    def period_start(granularity, keys):
+        """
+            Data de início de cada período a partir das chaves inteiras (eixo dos gráficos)
+        """
+        keys = np.asarray(keys, dtype='int64')
+        if granularity == 'month':
+            return pd.DatetimeIndex(keys.astype('datetime64[M]').astype('datetime64[ns]'))
+        if granularity == 'week':
+            keys = keys * 7 - 4
+        return pd.DatetimeIndex(keys.astype('datetime64[D]').astype('datetime64[ns]'))
+
+#==================================================
+# Funções
+#==================================================
+def daily_orders(df1, calendar):
+    """
+        Pedidos por dia e entregador: a menor tabela da qual todos os períodos saem
+        por re-agregação (o número de entregadores únicos não pode ser somado entre dias).
+
+        Input: Dataframe filtrado dos pedidos (ou já contado por data e entregador na
+               coluna 'orders', ex.: utils.sqlstore.SqlStore.daily_orders) e Calendar
+        Output: Dataframe com as colunas 'day' (posição no calendário), 'deliverer'
+                (código do entregador) e 'orders'
+    """
+    day = calendar.codes(df1['Order_Date'].to_numpy()).astype('int64')
+    delivers = df1['Delivery_person_ID']
+    deliverer = (delivers.cat.codes.to_numpy() if isinstance(delivers.dtype, pd.CategoricalDtype)
+                 else pd.factorize(delivers)[0]).astype('int64')
+
+    # Par (dia, entregador) codificado em um único inteiro
+    base = deliverer.max(initial=0) + 1
+    if 'orders' not in df1:
+        pairs, orders = np.unique(day * base + deliverer, return_counts=True)
+    else:
+        pairs, inverse = np.unique(day * base + deliverer, return_inverse=True)
+        orders = np.bincount(inverse, weights=df1['orders'].to_numpy(), minlength=len(pairs)).astype('int64')
+    return pd.DataFrame({'day': pairs // base, 'deliverer': pairs % base, 'orders': orders})
+
+def time_buckets(df_daily, calendar, granularity='week'):
+    """
+        Re-agrega a tabela de daily_orders no período escolhido, sem voltar às linhas dos pedidos.
+
+        Input: saída de daily_orders, Calendar e granularidade ('day', 'week' ou 'month')
+        Output: Dataframe com as colunas 'period' (início do período), 'orders',
+                'deliverers' (entregadores únicos) e 'order_by_deliver'
+    """
+    keys = calendar.keys(granularity, df_daily['day'].to_numpy())
+    periods, bucket = np.unique(keys, return_inverse=True)
+
+    # Cada linha de df_daily é um par (dia, entregador) único; pares repetidos no mesmo período contam uma vez
+    deliverer = df_daily['deliverer'].to_numpy()
+    base = deliverer.max(initial=0) + 1
+    unique_pairs = np.unique(bucket * base + deliverer)
+    orders = np.bincount(bucket, weights=df_daily['orders'].to_numpy(), minlength=len(periods)).astype('int64')
+    deliverers = np.bincount(unique_pairs // base, minlength=len(periods))
+
+    return pd.DataFrame({'period': calendar.period_start(granularity, periods),
+                         'orders': orders,
+                         'deliverers': deliverers,
+                         'order_by_deliver': orders / np.maximum(deliverers, 1)})
+
+@st.cache_resource(max_entries=1, show_spinner=False)
+def _load_calendar(path, signature):
+    if SQL_BACKEND:
+        return Calendar(load_store(path).dates())
+    return Calendar(load_order_filter(path).dates)
+
+def load_calendar(path=DATASET_PATH):
+    """
+        Dimensão de calendário das datas dos pedidos, construída uma vez por processo e por versão do csv
+    """
+    return _load_calendar(path, file_signature(path))
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def _daily_orders(date_limit, traffic_options, path, signature):
+    if SQL_BACKEND:
+        return daily_orders(load_store(path).daily_orders(date_limit, list(traffic_options)), load_calendar(path))
+    df1 = load_order_filter(path).filter(date_limit, list(traffic_options), columns=['Order_Date', 'Delivery_person_ID'])
+    return daily_orders(df1, load_calendar(path))
+
+def orders_by_period(date_limit, traffic_options, granularity='week', path=DATASET_PATH):
+    """
+        Pedidos e entregadores únicos por período (ver time_buckets). A tabela diária fica
+        em cache por estado dos filtros, então trocar a granularidade só re-agrega essa tabela
+        (com o backend SQL, a tabela diária é contada no banco).
+    """
+    df_daily = _daily_orders(date_limit, tuple(traffic_options), path, file_signature(path))
+    return time_buckets(df_daily, load_calendar(path), granularity)
@@ -0,0 +1,133 @@
+#==================================================
+# Import das Bibliotecas
+#==================================================
+
+import itertools
+import os
+import threading
+
+import pandas as pd
+import streamlit as st
+
+from utils.cache import LRUCache
+from utils.data import DATASET_PATH, file_signature
+from utils.filters import DEFAULT_DATE_LIMIT, TRAFFIC_OPTIONS
+from utils.lazy import lazy_import
+
+pio = lazy_import('plotly.io')
+
+#==================================================
+# Configurações
+#==================================================
+
+# Limites do cache de figuras (json serializado de cada figura)
+FIGURE_CACHE_ENTRIES = 2048
+FIGURE_CACHE_BYTES = 64_000_000
+
+# Threads de pré-cálculo disparadas por qualquer FigureCache do processo
+_warm_up_threads = []
+_warm_up_lock = threading.Lock()
+
+#==================================================
+# Funções
+#==================================================
+def traffic_subsets(options=TRAFFIC_OPTIONS):
+    """
+        Todos os subconjuntos das condições de trânsito (inclusive o vazio), na ordem das opções
+    """
+    return [list(subset) for size in range(len(options) + 1)
+            for subset in itertools.combinations(options, size)]
+
+def wait_warm_up(timeout=None):
+    """
+        Espera o fim dos pré-cálculos de figuras disparados no processo (ex.: benchmarks)
+    """
+    with _warm_up_lock:
+        threads = list(_warm_up_threads)
+    for thread in threads:
+        thread.join(timeout)
+
+#==================================================
+# Classes
+#==================================================
+class FigureCache:
+    """
+        Cache das figuras do Plotly, compartilhado entre sessões.
+        
+        - Chave: (gráfico, data limite, condições de trânsito, versão do dataset)
+        - Valor: json da figura, com descarte LRU limitado por bytes
+        
+        Cada gráfico é registrado com a função que monta a figura e o filtro
+        (utils.filters.OrderFilter) dos dados que ela recebe, o que permite
+        pré-calcular as figuras fora do rerun da página (warm_up).
+    """
+    def __init__(self, max_entries=FIGURE_CACHE_ENTRIES, max_bytes=FIGURE_CACHE_BYTES):
+        self.cache = LRUCache(max_entries=max_entries, max_bytes=max_bytes, sizeof=len)
+        self.builders = {}
+        self._warmed = set()
+        self._lock = threading.Lock()
+
+    def register(self, chart, func, data_filter):
+        """
+            Registra o gráfico chart, montado por func(data_filter.filter(data limite, trânsito))
+        """
+        self.builders[chart] = (func, data_filter)
+
+    def _key(self, chart, date_limit, traffic_options, signature):
+        return (chart, pd.Timestamp(date_limit), tuple(sorted(traffic_options)), signature)
+
+    def _build(self, chart, date_limit, traffic_options):
+        func, data_filter = self.builders[chart]
+        return func(data_filter.filter(date_limit, list(traffic_options))).to_json()
+
+    def get_json(self, chart, date_limit, traffic_options, path=DATASET_PATH):
+        key = self._key(chart, date_limit, traffic_options, file_signature(path))
+        return self.cache.get_or_compute(key, lambda: self._build(chart, date_limit, traffic_options))
+
+    def get(self, chart, date_limit, traffic_options, path=DATASET_PATH):
+        """
+            Input: nome do gráfico registrado, data limite e lista de condições de trânsito
+            Output: figura do Plotly (do cache quando o estado dos filtros já foi visto)
+        """
+        return pio.from_json(self.get_json(chart, date_limit, traffic_options, path))
+
+    def warm_up(self, charts, date_limits=(DEFAULT_DATE_LIMIT,), path=DATASET_PATH):
+        """
+            Pré-calcula as figuras dos gráficos para as datas limite e para
+            todos os subconjuntos das condições de trânsito
+            
+            Output: quantidade de figuras calculadas
+        """
+        built = 0
+        for chart, date_limit, traffic_options in itertools.product(charts, date_limits, traffic_subsets()):
+            key = self._key(chart, date_limit, traffic_options, file_signature(path))
+            if key not in self.cache:
+                self.cache.put(key, self._build(chart, date_limit, traffic_options))
+                built += 1
+        return built
+
+    def start_warm_up(self, charts, path=DATASET_PATH):
+        """
+            Dispara warm_up em uma thread, uma única vez por gráfico e versão do dataset,
+            para que o primeiro rerun da página não espere o pré-cálculo
+        """
+        path = os.path.abspath(path)
+        signature = file_signature(path)
+        with self._lock:
+            pending = [chart for chart in charts if (chart, signature) not in self._warmed]
+            self._warmed.update((chart, signature) for chart in pending)
+        if pending:
+            # O plotly importa o motor de json (orjson) no primeiro to_json e, em outra thread,
+            # pode receber o módulo ainda pela metade: a importação acontece aqui, antes da thread
+            pio.to_json({}, validate=False)
+            thread = threading.Thread(target=self.warm_up, args=(pending,), kwargs={'path': path}, daemon=True)
+            thread.start()
+            with _warm_up_lock:
+                _warm_up_threads[:] = [t for t in _warm_up_threads if t.is_alive()] + [thread]
+
+@st.cache_resource(show_spinner=False)
+def load_figure_cache():
+    """
+        Cache de figuras, compartilhado entre sessões
+    """
+    return FigureCache()
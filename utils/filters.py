@@ -0,0 +1,131 @@
+#==================================================
+# Import das Bibliotecas
+#==================================================
+
+import datetime
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.aggregates import load_cube, load_sketches
+from utils.data import DATASET_PATH, file_signature, freeze, load_data
+from utils.sqlstore import SQL_BACKEND, SqlCubeFilter, load_store
+
+#==================================================
+# Configurações
+#==================================================
+
+# Valores padrão dos filtros da barra lateral
+DEFAULT_DATE_LIMIT = datetime.datetime(2022, 4, 13)
+TRAFFIC_OPTIONS = ['Low', 'Medium', 'High', 'Jam']
+
+#==================================================
+# Classes
+#==================================================
+class OrderFilter:
+    """
+        Motor de filtros da barra lateral sobre um dataframe ordenado por 'Order_Date'
+        (linhas dos pedidos, cubo de métricas ou sketches de quantis).
+        
+        - Data limite: busca binária (searchsorted) nas datas ordenadas, que vira um
+          recorte [0, fim) das linhas.
+        - Trânsito: posições das linhas de cada categoria de 'Road_traffic_density',
+          calculadas uma vez (em ordem, portanto também ordenadas por data). Cada
+          categoria selecionada contribui com o prefixo das suas posições anteriores ao
+          fim do recorte (outra busca binária) e os prefixos são intercalados:
+          O(log n + k log c) por rerun, sem percorrer as n linhas.
+        
+        Quando todas as linhas do recorte passam no filtro de trânsito o resultado é
+        uma view (iloc com slice); caso contrário só as k linhas selecionadas (e só as
+        colunas pedidas) são copiadas.
+        
+        O dataframe de origem é guardado uma vez por processo e compartilhado entre as
+        sessões: as colunas numéricas, de datas e categóricas ficam somente leitura
+        (ver utils.data.freeze), então views também ficam e nenhuma função de página
+        consegue alterá-las.
+    """
+    def __init__(self, df1):
+        if not df1['Order_Date'].is_monotonic_increasing:
+            df1 = df1.sort_values('Order_Date', kind='stable', ignore_index=True)
+        traffic = df1['Road_traffic_density'].astype('category')
+
+        self.df1 = freeze(df1)
+        self.dates = df1['Order_Date'].to_numpy()
+        self.categories = traffic.cat.categories
+
+        # Posições das linhas agrupadas por código (o argsort estável mantém a ordem das
+        # linhas dentro de cada categoria); o código -1 (valor ausente) fica de fora
+        codes = traffic.cat.codes.to_numpy()
+        order = np.argsort(codes, kind='stable')
+        bounds = codes[order].searchsorted(np.arange(len(self.categories) + 1))
+        self.positions = [order[start:stop] for start, stop in zip(bounds[:-1], bounds[1:])]
+
+    def rows(self, date_limit, traffic_options):
+        """
+            Input: data limite (exclusiva) e lista de condições de trânsito
+            Output: linhas selecionadas, como slice(0, fim) quando todas as linhas do recorte
+                    passam no filtro de trânsito ou como array de posições
+        """
+        end = self.dates.searchsorted(np.datetime64(date_limit, 'ns'), side='left')
+
+        prefixes = [self.positions[code][:self.positions[code].searchsorted(end)]
+                    for code in np.flatnonzero(self.categories.isin(traffic_options))]
+        if sum(len(prefix) for prefix in prefixes) == end:
+            return slice(0, end)
+        if not prefixes:
+            return np.empty(0, dtype=np.intp)
+        # Os prefixos já estão ordenados: o sort estável (timsort) só intercala as sequências
+        return np.sort(np.concatenate(prefixes), kind='stable')
+
+    def filter(self, date_limit, traffic_options, columns=None):
+        """
+            Input: data limite (exclusiva), lista de condições de trânsito e colunas usadas
+                   (todas quando None)
+            Output: Dataframe filtrado: view de todas as colunas (ver freeze) quando as
+                    linhas são um recorte contínuo, senão cópia das linhas e colunas pedidas
+        """
+        rows = self.rows(date_limit, traffic_options)
+        if isinstance(rows, slice):
+            return self.df1.iloc[rows]
+        # Coluna a coluna: o iloc com um array de posições (take) consolidaria, no lugar, os
+        # blocos do dataframe compartilhado em cópias graváveis (ver utils.data.freeze)
+        columns = self.df1.columns if columns is None else columns
+        return pd.DataFrame({col: self.df1[col].array.take(rows) for col in columns},
+                            index=self.df1.index[rows])
+
+#==================================================
+# Funções
+#==================================================
+@st.cache_resource(max_entries=1, show_spinner=False)
+def _load_order_filter(path, signature):
+    return OrderFilter(load_data(path))
+
+@st.cache_resource(max_entries=1, show_spinner=False)
+def _load_cube_filter(path, signature):
+    return OrderFilter(load_cube(path))
+
+@st.cache_resource(max_entries=1, show_spinner=False)
+def _load_sketch_filter(path, signature):
+    return OrderFilter(load_sketches(path))
+
+def load_order_filter(path=DATASET_PATH):
+    """
+        Motor de filtros sobre as linhas dos pedidos, compartilhado entre sessões
+    """
+    return _load_order_filter(path, file_signature(path))
+
+def load_cube_filter(path=DATASET_PATH):
+    """
+        Motor de filtros sobre o cubo de métricas, compartilhado entre sessões
+        (com o backend SQL, o cubo de cada estado dos filtros é agregado no banco)
+    """
+    if SQL_BACKEND:
+        return SqlCubeFilter(load_store(path))
+    return _load_cube_filter(path, file_signature(path))
+
+def load_sketch_filter(path=DATASET_PATH):
+    """
+        Motor de filtros sobre os sketches de quantis, compartilhado entre sessões
+    """
+    return _load_sketch_filter(path, file_signature(path))
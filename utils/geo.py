@@ -0,0 +1,148 @@
+#==================================================
+# Import das Bibliotecas
+#==================================================
+
+import os
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.data import DATASET_PATH, file_signature
+from utils.filters import load_order_filter
+from utils.lazy import lazy_import
+from utils.sqlstore import SQL_BACKEND, load_store
+
+# O folium só é importado quando um mapa é montado (as páginas usam distance_by_city sem mapa)
+folium = lazy_import('folium')
+folium_plugins = lazy_import('folium.plugins')
+
+#==================================================
+# Configurações
+#==================================================
+
+# Limite padrão do tamanho do html do mapa enviado ao navegador (CURRY_MAP_MAX_BYTES)
+MAP_MAX_BYTES = int(os.environ.get('CURRY_MAP_MAX_BYTES', 2_000_000))
+
+# Lado inicial (em graus, ~1 km) das células da grade de agregação das coordenadas
+MAP_CELL_DEGREES = 0.01
+
+# Estimativas usadas para escolher o tamanho da célula antes de montar o mapa:
+# bytes de cada ponto [lat, lon, pedidos] no html, de cada marcador de mediana (com o popup)
+# e bytes fixos do mapa (scripts, estilos)
+_BYTES_PER_POINT = 32
+_BYTES_PER_MEDIAN = 1_000
+_BASE_BYTES = 10_000
+
+# Função javascript do agrupamento de marcadores: um marcador por célula, com a quantidade de pedidos
+_CLUSTER_CALLBACK = """
+function (row) {
+    var marker = L.marker(new L.LatLng(row[0], row[1]));
+    marker.bindPopup(row[2] + ' pedidos');
+    return marker;
+}
+"""
+
+#==================================================
+# Funções
+#==================================================
+def bin_locations(df1, lat_col, lon_col, cell=MAP_CELL_DEGREES):
+    """
+        Agrega as coordenadas em uma grade de células de lado cell (graus).
+        Cada célula vira um ponto no centróide das suas coordenadas, com a quantidade de pedidos.
+        
+        Input: Dataframe, colunas de latitude e longitude e lado da célula
+        Output: Dataframe com as colunas 'lat', 'lon' e 'orders'
+    """
+    lat = df1[lat_col].to_numpy(dtype='float64')
+    lon = df1[lon_col].to_numpy(dtype='float64')
+    cell_lat = np.floor(lat / cell).astype('int64')
+    cell_lon = np.floor(lon / cell).astype('int64')
+    keys = (cell_lat << 32) + cell_lon
+
+    _, inverse, counts = np.unique(keys, return_inverse=True, return_counts=True)
+    return pd.DataFrame({'lat': np.bincount(inverse, weights=lat) / counts,
+                         'lon': np.bincount(inverse, weights=lon) / counts,
+                         'orders': counts})
+
+def _points(df_bins):
+    return df_bins.round({'lat': 5, 'lon': 5}).to_numpy().tolist()
+
+def order_map_bins(df1, max_bytes=MAP_MAX_BYTES, cell=MAP_CELL_DEGREES, medians=0):
+    """
+        Células das entregas e dos restaurantes usadas no mapa. A célula dobra de
+        tamanho até que o html estimado (com os marcadores das medianas) caiba em max_bytes.
+        
+        Input: Dataframe filtrado, limite de bytes do html, lado inicial da célula
+               e quantidade de marcadores de mediana do mapa
+        Output: (Dataframe das entregas, Dataframe dos restaurantes), ver bin_locations
+    """
+    fixed_bytes = _BASE_BYTES + medians * _BYTES_PER_MEDIAN
+    while True:
+        delivery = bin_locations(df1, 'Delivery_location_latitude', 'Delivery_location_longitude', cell)
+        restaurant = bin_locations(df1, 'Restaurant_latitude', 'Restaurant_longitude', cell)
+        estimated_bytes = fixed_bytes + (2 * len(delivery) + len(restaurant)) * _BYTES_PER_POINT
+        if estimated_bytes <= max_bytes or cell >= 180:
+            return delivery, restaurant
+        cell *= 2
+
+def build_order_map(df1, df_medians=None, max_bytes=MAP_MAX_BYTES, cell=MAP_CELL_DEGREES, bins=None):
+    """
+        Monta o mapa dos pedidos com quatro camadas (selecionáveis no controle de camadas):
+        
+        - Medianas: um marcador na mediana do local de entrega por cidade e trânsito
+          (df_medians, ex.: utils.sketches.median_locations; calculadas a partir de df1 quando None)
+        - Mapa de calor das entregas e dos restaurantes, com um ponto por célula da grade
+        - Agrupamento de marcadores das células de entrega
+        
+        As coordenadas são agregadas em células antes de irem para o html, então o
+        tamanho do mapa depende do número de células e não do número de pedidos
+        (ver order_map_bins; bins recebe as células já calculadas, ex.: utils.precompute).
+        
+        Input: Dataframe filtrado, medianas por cidade e trânsito, limite de bytes do html,
+               lado inicial da célula e células pré-calculadas
+        Output: folium.Map
+    """
+    df_aux = df_medians
+    if df_aux is None:
+        df_aux = (df1.loc[:, ['City', 'Road_traffic_density', 'Delivery_location_latitude', 'Delivery_location_longitude']]
+                     .groupby(['City', 'Road_traffic_density'], observed=True)
+                     .median()
+                     .reset_index())
+    delivery, restaurant = bins if bins is not None else order_map_bins(df1, max_bytes, cell, medians=len(df_aux))
+
+    map = folium.Map()
+
+    medians = folium.FeatureGroup(name='Medianas por cidade e trânsito')
+    for index, location_info in df_aux.iterrows():
+        folium.Marker([location_info['Delivery_location_latitude'], location_info['Delivery_location_longitude']],
+                       popup=location_info[['City', 'Road_traffic_density']]).add_to(medians)
+    medians.add_to(map)
+
+    folium_plugins.HeatMap(_points(delivery), name='Mapa de calor das entregas', radius=12).add_to(map)
+    folium_plugins.HeatMap(_points(restaurant), name='Mapa de calor dos restaurantes', radius=12, show=False).add_to(map)
+    folium_plugins.FastMarkerCluster(_points(delivery), callback=_CLUSTER_CALLBACK,
+                                     name='Agrupamento das entregas', show=False).add_to(map)
+
+    folium.LayerControl().add_to(map)
+    return map
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def _distance_by_city(date_limit, traffic_options, path, signature):
+    if SQL_BACKEND:
+        # Mesmo tipo da média em memória (a distância fica em float32)
+        return (load_store(path).mean_by(date_limit, list(traffic_options), 'distance', ['City'])
+                                .astype({'distance': 'float32'}))
+    df1 = load_order_filter(path).filter(date_limit, list(traffic_options), columns=['City', 'distance'])
+    return df1.loc[:, ['City', 'distance']].groupby('City', observed=True).mean().reset_index()
+
+def distance_by_city(date_limit, traffic_options, path=DATASET_PATH):
+    """
+        Distância média das entregas por cidade, em cache por estado dos filtros
+        (data limite, condições de trânsito) e pela versão do dataset
+        (agregada no banco com o backend SQL).
+        
+        Input: data limite e lista de condições de trânsito
+        Output: Dataframe com as colunas 'City' e 'distance'
+    """
+    return _distance_by_city(date_limit, tuple(traffic_options), path, file_signature(path))
@@ -0,0 +1,245 @@
+#==================================================
+# Import das Bibliotecas
+#==================================================
+
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+import streamlit as st
+
+#==================================================
+# Configurações
+#==================================================
+
+# Instrumentação das etapas das páginas (desligada por padrão):
+# CURRY_INSTRUMENT=time -> tempo e linhas; CURRY_INSTRUMENT=1 -> também memória (tracemalloc)
+INSTRUMENT = os.environ.get('CURRY_INSTRUMENT', '0').lower()
+ENABLED = INSTRUMENT not in ('', '0', 'false', 'off')
+TRACE_MEMORY = ENABLED and INSTRUMENT != 'time'
+
+# Arquivo de métricas: '.prom' grava o formato texto do Prometheus (sobrescrito a cada
+# execução, com totais acumulados no processo); qualquer outra extensão acrescenta
+# uma linha json por execução da página
+METRICS_PATH = os.environ.get('CURRY_METRICS_PATH')
+
+_local = threading.local()
+_totals = {}
+_totals_lock = threading.Lock()
+
+#==================================================
+# Classes
+#==================================================
+class _NoopStep:
+    """
+        Etapa usada com a instrumentação desligada: não mede nada
+    """
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __setattr__(self, name, value):
+        pass
+
+_NOOP_STEP = _NoopStep()
+
+class Step:
+    """
+        Etapa medida: tempo de relógio, linhas processadas e memória alocada
+        (pico e saldo, em bytes, quando TRACE_MEMORY). A quantidade de linhas pode
+        ser informada na criação ou depois, dentro do bloco (step.rows = ...).
+        
+        Com etapas aninhadas o pico da etapa externa inclui o das internas. O
+        tracemalloc é global ao processo, então sessões simultâneas somam memória.
+    """
+    def __init__(self, run, name, rows=None):
+        self.run = run
+        self.name = name
+        self.rows = rows
+        self.max_peak = 0
+
+    def __enter__(self):
+        if TRACE_MEMORY:
+            current, peak = tracemalloc.get_traced_memory()
+            if self.run.stack:
+                parent = self.run.stack[-1]
+                parent.max_peak = max(parent.max_peak, peak)
+            tracemalloc.reset_peak()
+            self.start_memory = current
+        self.run.stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        seconds = time.perf_counter() - self.start
+        self.run.stack.pop()
+        record = {'page': self.run.page, 'step': self.name, 'seconds': seconds, 'rows': self.rows}
+        if TRACE_MEMORY:
+            current, peak = tracemalloc.get_traced_memory()
+            record['peak_bytes'] = max(self.max_peak, peak) - self.start_memory
+            record['net_bytes'] = current - self.start_memory
+            if self.run.stack:
+                parent = self.run.stack[-1]
+                parent.max_peak = max(parent.max_peak, self.max_peak, peak)
+        self.run.records.append(record)
+        return False
+
+class Run:
+    """
+        Execução (rerun) de uma página: lista das etapas medidas
+    """
+    def __init__(self, page):
+        self.page = page
+        self.records = []
+        self.stack = []
+        self.created_at = time.time()
+
+#==================================================
+# Funções
+#==================================================
+def start_run(page):
+    """
+        Começa a medição de uma execução da página (chamar no topo do script)
+    """
+    if not ENABLED:
+        return None
+    if TRACE_MEMORY and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    _local.run = Run(page)
+    return _local.run
+
+def step(name, rows=None):
+    """
+        Context manager que mede o bloco como a etapa name da execução atual
+        (no-op quando a instrumentação está desligada ou fora de uma execução)
+    """
+    run = getattr(_local, 'run', None) if ENABLED else None
+    if run is None:
+        return _NOOP_STEP
+    return Step(run, name, rows)
+
+def fork_run():
+    """
+        Execução atual preparada para outra thread (ver use_run): as etapas vão para a
+        mesma lista, com uma pilha própria para o aninhamento. Com TRACE_MEMORY os picos
+        de etapas simultâneas se misturam, como entre sessões.
+    """
+    run = getattr(_local, 'run', None) if ENABLED else None
+    if run is None:
+        return None
+    child = Run(run.page)
+    child.records = run.records
+    child.created_at = run.created_at
+    return child
+
+@contextlib.contextmanager
+def use_run(run):
+    """
+        Context manager que mede as etapas da thread atual na execução run (saída de fork_run)
+    """
+    previous = getattr(_local, 'run', None)
+    _local.run = run
+    try:
+        yield run
+    finally:
+        _local.run = previous
+
+def _count_rows(args):
+    # Só chamada com a instrumentação ligada: o pandas não entra no import do Home
+    import pandas as pd
+    for arg in args:
+        if isinstance(arg, pd.DataFrame):
+            return len(arg)
+    return None
+
+def instrumented(func=None, name=None):
+    """
+        Decorator que mede cada chamada de func como uma etapa
+        (linhas = tamanho do primeiro Dataframe dos argumentos)
+    """
+    if func is None:
+        return functools.partial(instrumented, name=name)
+    name = name or func.__name__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if not ENABLED:
+            return func(*args, **kwargs)
+        with step(name, rows=_count_rows(args)):
+            return func(*args, **kwargs)
+    return wrapper
+
+def _folium_static(*args, **kwargs):
+    # O streamlit_folium (e o folium) só é importado quando um mapa é renderizado
+    from streamlit_folium import folium_static
+    return folium_static(*args, **kwargs)
+
+# Chamadas de renderização medidas (mesmos argumentos das originais)
+plotly_chart = instrumented(st.plotly_chart, name='st.plotly_chart')
+dataframe = instrumented(st.dataframe, name='st.dataframe')
+folium_static = instrumented(_folium_static, name='folium_static')
+
+def prometheus_text(totals):
+    """
+        Totais acumulados por (página, etapa) no formato texto do Prometheus
+    """
+    metrics = [('curry_step_calls_total', 'counter', 'Execuções da etapa', 'calls'),
+               ('curry_step_seconds_total', 'counter', 'Tempo de relógio acumulado da etapa (s)', 'seconds'),
+               ('curry_step_rows_total', 'counter', 'Linhas processadas pela etapa', 'rows'),
+               ('curry_step_peak_bytes', 'gauge', 'Pico de memória alocada na última execução da etapa', 'peak_bytes')]
+    lines = []
+    for metric, kind, description, field in metrics:
+        lines.append('# HELP {} {}'.format(metric, description))
+        lines.append('# TYPE {} {}'.format(metric, kind))
+        for (page, name), values in sorted(totals.items()):
+            if values.get(field) is not None:
+                labels = 'page="{}",step="{}"'.format(page, name.replace('"', '\\"'))
+                lines.append('{}{{{}}} {}'.format(metric, labels, values[field]))
+    return '\n'.join(lines) + '\n'
+
+def export(run, path=METRICS_PATH):
+    """
+        Acumula os totais do processo e grava as métricas da execução em path
+    """
+    with _totals_lock:
+        for record in run.records:
+            values = _totals.setdefault((record['page'], record['step']), {'calls': 0, 'seconds': 0.0, 'rows': 0})
+            values['calls'] += 1
+            values['seconds'] += record['seconds']
+            values['rows'] += record['rows'] or 0
+            if 'peak_bytes' in record:
+                values['peak_bytes'] = record['peak_bytes']
+        if path is None:
+            return
+        if path.endswith('.prom'):
+            tmp_path = path + '.tmp-{}'.format(os.getpid())
+            with open(tmp_path, 'w') as f:
+                f.write(prometheus_text(_totals))
+            os.replace(tmp_path, path)
+        else:
+            with open(path, 'a') as f:
+                f.write(json.dumps({'page': run.page, 'created_at': run.created_at, 'steps': run.records}) + '\n')
+
+def finish_run():
+    """
+        Encerra a medição da execução atual: mostra o painel de debug na barra
+        lateral e exporta as métricas (chamar no fim do script)
+    """
+    run = getattr(_local, 'run', None) if ENABLED else None
+    if run is None:
+        return
+    _local.run = None
+
+    import pandas as pd
+    df_steps = pd.DataFrame(run.records)
+    with st.sidebar.expander('Debug: etapas da página'):
+        st.dataframe(df_steps, hide_index=True)
+        st.caption('Total: {:.3f} s'.format(time.time() - run.created_at))
+
+    export(run)
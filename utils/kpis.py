@@ -0,0 +1,170 @@
+#==================================================
+# Import das Bibliotecas
+#==================================================
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.cache import LRUCache
+from utils.data import DATASET_PATH, file_signature
+from utils.filters import load_order_filter
+from utils.sqlstore import SQL_BACKEND, load_store
+
+#==================================================
+# Configurações
+#==================================================
+
+# Métricas gerais das páginas: nome -> (coluna, operação, condição)
+# Operações: 'nunique', 'count', 'mean', 'std' (ddof=1), 'min' e 'max'
+# Condição: None (todas as linhas) ou (coluna, valor)
+KPIS = {
+    'delivery_unique': ('Delivery_person_ID', 'nunique', None),
+    'avg_distance': ('distance', 'mean', None),
+    'avg_time_festival': ('Time_taken(min)', 'mean', ('Festival', 'Yes')),
+    'std_time_festival': ('Time_taken(min)', 'std', ('Festival', 'Yes')),
+    'avg_time_no_festival': ('Time_taken(min)', 'mean', ('Festival', 'No')),
+    'std_time_no_festival': ('Time_taken(min)', 'std', ('Festival', 'No')),
+    'max_age': ('Delivery_person_Age', 'max', None),
+    'min_age': ('Delivery_person_Age', 'min', None),
+    'max_vehicle_condition': ('Vehicle_condition', 'max', None),
+    'min_vehicle_condition': ('Vehicle_condition', 'min', None),
+}
+
+# Limites do cache de resultados (por estado dos filtros)
+KPI_CACHE_ENTRIES = 256
+KPI_CACHE_BYTES = 1_000_000
+
+#==================================================
+# Funções
+#==================================================
+def _group_codes(df1, where_col):
+    """
+        Códigos de grupo da coluna da condição (um único grupo quando não há condição)
+    """
+    if where_col is None:
+        return np.zeros(len(df1), dtype='int64'), pd.Index([None])
+    codes, uniques = pd.factorize(df1[where_col], use_na_sentinel=True)
+    return codes, uniques
+
+def _reduce(values, codes, n_groups, op):
+    """
+        Aplica a operação em cada grupo (códigos 0..n_groups-1; -1 é ignorado)
+    """
+    valid = codes >= 0
+    if op in ('count', 'mean', 'std'):
+        weights = values.astype('float64')
+        count = np.bincount(codes[valid], minlength=n_groups)
+        total = np.bincount(codes[valid], weights=weights[valid], minlength=n_groups)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            if op == 'count':
+                return count
+            mean = total / count
+            if op == 'mean':
+                return mean
+            sumsq = np.bincount(codes[valid], weights=weights[valid] ** 2, minlength=n_groups)
+            return np.sqrt(np.maximum(sumsq - count * mean ** 2, 0) / (count - 1))
+
+    result = []
+    for code in range(n_groups):
+        group = values[codes == code]
+        if op == 'nunique':
+            result.append(len(pd.unique(group)))
+        elif op == 'min':
+            result.append(group.min() if len(group) else np.nan)
+        elif op == 'max':
+            result.append(group.max() if len(group) else np.nan)
+        else:
+            raise ValueError('Operação desconhecida: {}'.format(op))
+    return result
+
+def kpi_columns(kpis=KPIS):
+    """
+        Colunas lidas pelas métricas declaradas (valores e condições)
+    """
+    columns = [col for col, _, _ in kpis.values()] + [where[0] for _, _, where in kpis.values() if where is not None]
+    return list(dict.fromkeys(columns))
+
+def compute_kpis(df1, kpis=KPIS):
+    """
+        Calcula todas as métricas declaradas de uma vez: cada coluna é lida uma
+        única vez e as métricas com condição (ex.: Festival 'Yes'/'No') saem juntas
+        de uma agregação por grupo sobre os códigos da coluna da condição.
+        
+        Input: Dataframe filtrado e declaração das métricas (ver KPIS)
+        Output: dicionário nome -> valor
+    """
+    plans = {}
+    for name, (col, op, where) in kpis.items():
+        where_col, where_value = where if where is not None else (None, None)
+        plans.setdefault((col, where_col), []).append((name, op, where_value))
+
+    results = {}
+    groups = {}
+    for (col, where_col), items in plans.items():
+        if where_col not in groups:
+            groups[where_col] = _group_codes(df1, where_col)
+        codes, uniques = groups[where_col]
+        values = df1[col].to_numpy()
+
+        reduced = {}
+        for name, op, where_value in items:
+            if op not in reduced:
+                reduced[op] = _reduce(values, codes, len(uniques), op)
+            position = uniques.get_indexer([where_value])[0]
+            if position >= 0:
+                results[name] = reduced[op][position]
+            else: # valor da condição ausente após o filtro
+                results[name] = 0 if op in ('count', 'nunique') else np.nan
+
+    return results
+
+#==================================================
+# Classes
+#==================================================
+class KpiEngine:
+    """
+        Métricas gerais (KPIS) memorizadas por estado dos filtros
+        (data limite, condições de trânsito), com descarte LRU e limite de memória.
+    """
+    def __init__(self, order_filter, kpis=KPIS, max_entries=KPI_CACHE_ENTRIES, max_bytes=KPI_CACHE_BYTES):
+        self.order_filter = order_filter
+        self.kpis = kpis
+        self.columns = kpi_columns(kpis)
+        self.cache = LRUCache(max_entries=max_entries, max_bytes=max_bytes)
+
+    def compute(self, date_limit, traffic_options):
+        return compute_kpis(self.order_filter.filter(date_limit, traffic_options, self.columns), self.kpis)
+
+    def get(self, date_limit, traffic_options):
+        """
+            Input: data limite e lista de condições de trânsito
+            Output: dicionário nome -> valor das métricas
+        """
+        key = (pd.Timestamp(date_limit), tuple(sorted(traffic_options)))
+        return self.cache.get_or_compute(key, lambda: self.compute(date_limit, traffic_options))
+
+class SqlKpiEngine(KpiEngine):
+    """
+        KpiEngine do backend SQL: as métricas de cada estado dos filtros são agregadas
+        no banco (utils.sqlstore.SqlStore.kpis), sem carregar as linhas dos pedidos
+    """
+    def __init__(self, store, kpis=KPIS, max_entries=KPI_CACHE_ENTRIES, max_bytes=KPI_CACHE_BYTES):
+        super().__init__(None, kpis, max_entries, max_bytes)
+        self.store = store
+
+    def compute(self, date_limit, traffic_options):
+        return self.store.kpis(date_limit, traffic_options, self.kpis)
+
+@st.cache_resource(max_entries=1, show_spinner=False)
+def _load_kpi_engine(path, signature):
+    if SQL_BACKEND:
+        return SqlKpiEngine(load_store(path))
+    return KpiEngine(load_order_filter(path))
+
+def load_kpi_engine(path=DATASET_PATH):
+    """
+        Motor de métricas gerais, compartilhado entre sessões
+        (com o backend SQL, as métricas são agregadas no banco)
+    """
+    return _load_kpi_engine(path, file_signature(path))
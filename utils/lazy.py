@@ -0,0 +1,57 @@
+#==================================================
+# Import das Bibliotecas
+#==================================================
+
+import importlib
+import sys
+import time
+
+from utils.instrument import step
+
+#==================================================
+# Configurações
+#==================================================
+
+# Tempo (segundos) da primeira importação de cada módulo carregado por um LazyModule no processo
+IMPORT_SECONDS = {}
+
+#==================================================
+# Classes
+#==================================================
+class LazyModule:
+    """
+        Módulo importado só no primeiro acesso a um atributo (ex.: px.line).
+
+        Bibliotecas pesadas de gráficos e mapas (plotly, folium) levam de meio a um segundo
+        para importar; declaradas com lazy_import no topo do arquivo, o custo só é pago quando
+        um painel que as usa é renderizado. A primeira importação é medida como a etapa
+        'import:<módulo>' da execução da página (ver utils.instrument) e guardada em IMPORT_SECONDS.
+    """
+    def __init__(self, name):
+        self.__dict__['_name'] = name
+
+    def _load(self):
+        if self._name in sys.modules:
+            # import_module (e não sys.modules) espera a importação em andamento em outra
+            # thread (painéis, pré-cálculo de figuras) em vez de devolver o módulo pela metade
+            return importlib.import_module(self._name)
+        start = time.perf_counter()
+        with step('import:' + self._name):
+            module = importlib.import_module(self._name)
+        IMPORT_SECONDS[self._name] = time.perf_counter() - start
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        return '<LazyModule {}>'.format(self._name)
+
+#==================================================
+# Funções
+#==================================================
+def lazy_import(name):
+    """
+        Substituto preguiçoso de 'import name' (ex.: px = lazy_import('plotly.express'))
+    """
+    return LazyModule(name)
@@ -0,0 +1,63 @@
+#==================================================
+# Import das Bibliotecas
+#==================================================
+
+import os
+
+import streamlit as st
+
+#==================================================
+# Configurações
+#==================================================
+
+# Modo de renderização das abas: preguiçoso (só a aba aberta é calculada) ou
+# o st.tabs original, que calcula todas as abas a cada rerun.
+# Desligar com CURRY_LAZY_PANELS=0.
+LAZY_PANELS = os.environ.get('CURRY_LAZY_PANELS', '1') != '0'
+
+#==================================================
+# Classes
+#==================================================
+class DeferredTabs:
+    """
+        Abas com painéis adiados: cada aba é uma lista de funções registradas
+        com panel() e só as funções da aba aberta são chamadas em render().
+        
+        O st.tabs executa o conteúdo de todas as abas em todo rerun (o navegador só
+        esconde as inativas). No modo preguiçoso as abas viram um seletor horizontal,
+        então a primeira pintura custa apenas o que está na tela; trocar de aba
+        dispara um rerun que calcula a aba escolhida.
+        
+        Input: nomes das abas, chave única do seletor e modo preguiçoso (padrão: LAZY_PANELS)
+    """
+    def __init__(self, labels, key, lazy=None):
+        self.labels = list(labels)
+        self.key = key
+        self.lazy = LAZY_PANELS if lazy is None else lazy
+        self.panels = {label: [] for label in self.labels}
+
+    def panel(self, label, func, *args, **kwargs):
+        """
+            Registra func(*args, **kwargs) como painel da aba label (na ordem de registro)
+        """
+        self.panels[label].append((func, args, kwargs))
+
+    def active(self):
+        """
+            Aba aberta na sessão (a primeira enquanto o seletor não foi usado)
+        """
+        return st.session_state.get(self.key, self.labels[0])
+
+    def _render_panels(self, label):
+        for func, args, kwargs in self.panels[label]:
+            func(*args, **kwargs)
+
+    def render(self):
+        if not self.lazy:
+            for label, tab in zip(self.labels, st.tabs(self.labels)):
+                with tab:
+                    self._render_panels(label)
+            return
+
+        label = st.radio('Aba', self.labels, horizontal=True, key=self.key, label_visibility='collapsed')
+        self._render_panels(label)
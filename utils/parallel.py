@@ -0,0 +1,100 @@
+#==================================================
+# Import das Bibliotecas
+#==================================================
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from utils.data import DATASET_PATH, load_snapshot, read_snapshot, snapshot_path
+from utils.stream import StreamAggregates
+
+#==================================================
+# Configurações
+#==================================================
+
+# Colunas usadas para dividir os dados entre os processos
+PARTITION_COLUMNS = ['Order_Date', 'City']
+
+# Dataframe (snapshot via mmap) de cada processo do pool (ver _init_worker)
+_worker_df = None
+
+#==================================================
+# Funções
+#==================================================
+def partitions(df1, by='Order_Date', parts=4):
+    """
+        Divide as linhas do snapshot em partes independentes:
+        
+        - 'Order_Date': parts faixas contíguas de linhas (o snapshot é ordenado pela
+          data), com os cortes ajustados para o início de um dia, então cada dia
+          fica inteiro em uma única parte
+        - 'City': uma parte por cidade
+        
+        Output: lista de especificações das partes ((início, fim) ou ('City', valor))
+    """
+    if by == 'Order_Date':
+        dates = df1['Order_Date'].to_numpy()
+        cuts = np.linspace(0, len(dates), parts + 1).astype('int64')[1:-1]
+        bounds = np.unique(np.concatenate([[0], dates.searchsorted(dates[cuts], side='left'), [len(dates)]]))
+        return [(int(start), int(end)) for start, end in zip(bounds[:-1], bounds[1:])]
+    if by == 'City':
+        return [('City', city) for city in df1['City'].dropna().unique()]
+    raise ValueError('Partição desconhecida: {} (use uma de {})'.format(by, PARTITION_COLUMNS))
+
+def select_partition(df1, spec):
+    if spec[0] == 'City':
+        return df1.loc[df1['City'] == spec[1]]
+    return df1.iloc[spec[0]:spec[1]]
+
+def _init_worker(path):
+    global _worker_df
+    _worker_df = read_snapshot(snapshot_path(path))
+
+def _aggregate_partition(spec):
+    return StreamAggregates().update(select_partition(_worker_df, spec))
+
+def parallel_aggregates(path=DATASET_PATH, by='Order_Date', workers=None):
+    """
+        Constrói os agregados do dataset (utils.stream.StreamAggregates) em paralelo:
+        cada processo abre o snapshot via mmap (as páginas do arquivo ficam
+        compartilhadas entre os processos pelo cache do sistema operacional),
+        agrega apenas a sua parte e os resultados parciais são combinados com merge()
+        (momentos de Welford para média e desvio padrão, união dos conjuntos de
+        entregadores únicos e soma das células do cubo).
+        
+        Input: caminho do csv, coluna da partição e quantidade de processos
+        Output: StreamAggregates
+    """
+    workers = workers or os.cpu_count() or 1
+    df1 = load_snapshot(path)
+    specs = partitions(df1, by, workers)
+
+    if workers == 1:
+        results = [StreamAggregates().update(select_partition(df1, spec)) for spec in specs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(path,)) as pool:
+            results = list(pool.map(_aggregate_partition, specs))
+
+    aggregates = StreamAggregates()
+    for partial in results:
+        aggregates.merge(partial)
+    return aggregates
+
+#==================================================
+# Execução
+#==================================================
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Agregação paralela do dataset por cidade ou por data.')
+    parser.add_argument('csv', nargs='?', default=DATASET_PATH, help='csv bruto de pedidos')
+    parser.add_argument('--by', choices=PARTITION_COLUMNS, default='Order_Date', help='coluna da partição')
+    parser.add_argument('--workers', type=int, help='processos (padrão: todos os núcleos)')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    aggregates = parallel_aggregates(args.csv, args.by, args.workers)
+    print('Pedidos agregados: {} em {:.2f}s'.format(aggregates.rows, time.perf_counter() - start))
@@ -0,0 +1,180 @@
+#==================================================
+# Import das Bibliotecas
+#==================================================
+
+import argparse
+import os
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+import streamlit as st
+
+from utils.aggregates import AGGREGATES_VERSION, save_aggregates
+from utils.data import DATASET_PATH, SNAPSHOT_VERSION, build_snapshot, file_signature, read_snapshot, snapshot_path
+from utils.figures import traffic_subsets
+from utils.filters import DEFAULT_DATE_LIMIT, OrderFilter
+from utils.geo import order_map_bins
+from utils.parallel import PARTITION_COLUMNS, parallel_aggregates
+from utils.sqlstore import build_database
+from utils.topk import top_bottom_k
+
+#==================================================
+# Configurações
+#==================================================
+
+# Versão do formato dos artefatos: mudar sempre que as visões pré-calculadas mudarem
+ARTIFACTS_VERSION = '2'
+
+# Quantidade de entregadores nas listas de mais rápidos e mais lentos
+TOP_K = 10
+
+# Filtro das linhas dos pedidos de cada processo do pool (ver _init_worker)
+_worker_filter = None
+
+#==================================================
+# Classes
+#==================================================
+class Artifacts:
+    """
+        Visões pré-calculadas por estado dos filtros (data limite, condições de trânsito):
+        
+        - 'top_k': (mais rápidos, mais lentos) por cidade, como top_delivers
+        - 'map_bins': (células das entregas, células dos restaurantes), como utils.geo.order_map_bins
+        
+        get() retorna None para estados que não foram pré-calculados; as páginas
+        então calculam a visão a partir das linhas filtradas.
+    """
+    def __init__(self, views=None):
+        self.views = views or {}
+
+    def get(self, name, date_limit, traffic_options):
+        return self.views.get(view_key(date_limit, traffic_options), {}).get(name)
+
+#==================================================
+# Funções
+#==================================================
+def view_key(date_limit, traffic_options):
+    return (pd.Timestamp(date_limit), tuple(sorted(traffic_options)))
+
+def artifacts_path(path):
+    """
+        Caminho das visões pré-calculadas, ao lado do csv
+        (ex.: dataset/train.csv -> dataset/train.artifacts.pkl)
+    """
+    return os.path.splitext(path)[0] + '.artifacts.pkl'
+
+def _init_worker(path):
+    global _worker_filter
+    _worker_filter = OrderFilter(read_snapshot(snapshot_path(path)))
+
+def _build_view(view):
+    date_limit, traffic_options = view
+    df1 = _worker_filter.filter(date_limit, traffic_options)
+    # Um marcador de mediana por cidade e trânsito entra na estimativa do tamanho do mapa
+    medians = df1.groupby(['City', 'Road_traffic_density'], observed=True).ngroups
+    return view_key(date_limit, traffic_options), {'top_k': top_bottom_k(df1, k=TOP_K),
+                                                   'map_bins': order_map_bins(df1, medians=medians)}
+
+def build_views(path, date_limits=(DEFAULT_DATE_LIMIT,), workers=None):
+    """
+        Calcula as visões de cada data limite e de cada subconjunto das condições de
+        trânsito, distribuídas entre os núcleos (cada processo abre o snapshot via mmap)
+        
+        Output: dicionário view_key -> visões
+    """
+    views = [(date_limit, traffic_options) for date_limit in date_limits for traffic_options in traffic_subsets()]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        _init_worker(path)
+        return dict(map(_build_view, views))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(path,)) as pool:
+        return dict(pool.map(_build_view, views))
+
+def save_artifacts(views, path=DATASET_PATH):
+    """
+        Grava as visões de forma atômica, com as versões dos formatos e a assinatura do csv
+    """
+    out_path = artifacts_path(path)
+    tmp_path = out_path + '.tmp-{}'.format(os.getpid())
+    with open(tmp_path, 'wb') as f:
+        pickle.dump({'version': ARTIFACTS_VERSION, 'snapshot_version': SNAPSHOT_VERSION,
+                     'aggregates_version': AGGREGATES_VERSION, 'signature': file_signature(path),
+                     'views': views}, f)
+    os.replace(tmp_path, out_path)
+
+def precompute(path=DATASET_PATH, date_limits=(DEFAULT_DATE_LIMIT,), workers=None, partition_by='Order_Date', sqlite=False):
+    """
+        Executa o pipeline completo fora do Streamlit e grava os artefatos ao lado do csv:
+        
+        1. Snapshot colunar do dataset limpo (utils.data)
+        2. Agregados: cubo de métricas, momentos, semanas e sketches (utils.aggregates),
+           calculados em paralelo por partição (utils.parallel)
+        3. Visões por estado dos filtros: top-k de entregadores e células do mapa
+        4. Opcional (sqlite): banco SQLite indexado dos pedidos (utils.sqlstore)
+        
+        Output: lista de (etapa, segundos)
+    """
+    timings = []
+    start = time.perf_counter()
+    build_snapshot(path)
+    timings.append(('snapshot', time.perf_counter() - start))
+
+    start = time.perf_counter()
+    save_aggregates(parallel_aggregates(path, partition_by, workers), path)
+    timings.append(('agregados', time.perf_counter() - start))
+
+    start = time.perf_counter()
+    save_artifacts(build_views(path, date_limits, workers), path)
+    timings.append(('visões', time.perf_counter() - start))
+
+    if sqlite:
+        start = time.perf_counter()
+        build_database(path)
+        timings.append(('sqlite', time.perf_counter() - start))
+    return timings
+
+def read_artifacts(path=DATASET_PATH):
+    """
+        Lê as visões pré-calculadas. Retorna Artifacts vazio quando elas não existem,
+        são de outra versão ou foram geradas a partir de outra versão do csv.
+    """
+    out_path = artifacts_path(path)
+    if not os.path.exists(out_path):
+        return Artifacts()
+    with open(out_path, 'rb') as f:
+        stored = pickle.load(f)
+    if (stored['version'] != ARTIFACTS_VERSION or stored['snapshot_version'] != SNAPSHOT_VERSION
+            or stored['signature'] != file_signature(path)):
+        return Artifacts()
+    return Artifacts(stored['views'])
+
+@st.cache_resource(max_entries=1, show_spinner=False)
+def _load_artifacts(path, signature):
+    return read_artifacts(path)
+
+def load_artifacts(path=DATASET_PATH):
+    """
+        Visões pré-calculadas, compartilhadas entre sessões
+    """
+    return _load_artifacts(path, file_signature(path))
+
+#==================================================
+# Execução
+#==================================================
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Gera offline os artefatos que as páginas abrem.')
+    parser.add_argument('csv', nargs='?', default=DATASET_PATH, help='csv bruto de pedidos')
+    parser.add_argument('--dates', nargs='+', default=[DEFAULT_DATE_LIMIT.strftime('%Y-%m-%d')],
+                        help='datas limite pré-calculadas (AAAA-MM-DD)')
+    parser.add_argument('--workers', type=int, help='processos usados nos agregados e nas visões (padrão: todos os núcleos)')
+    parser.add_argument('--partition-by', choices=PARTITION_COLUMNS, default='Order_Date',
+                        help='coluna da partição dos agregados')
+    parser.add_argument('--sqlite', action='store_true', help='gera também o banco SQLite dos pedidos')
+    args = parser.parse_args()
+
+    date_limits = [pd.Timestamp(date).to_pydatetime() for date in args.dates]
+    for name, seconds in precompute(args.csv, date_limits, args.workers, args.partition_by, args.sqlite):
+        print('{:<10} {:>8.2f}s'.format(name, seconds))
@@ -0,0 +1,104 @@
+#==================================================
+# Import das Bibliotecas
+#==================================================
+
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+from utils.instrument import fork_run, step, use_run
+
+#==================================================
+# Configurações
+#==================================================
+
+# Threads do pool compartilhado pelas sessões para calcular os painéis.
+# CURRY_PANEL_WORKERS=0 calcula os painéis em sequência, na thread do script.
+PANEL_WORKERS = int(os.environ.get('CURRY_PANEL_WORKERS', min(8, os.cpu_count() or 1)))
+
+# Pools compartilhados pelas sessões, um por quantidade de threads
+_executors = {}
+_executor_lock = threading.Lock()
+
+#==================================================
+# Classes
+#==================================================
+class PanelScheduler:
+    """
+        Calcula painéis independentes em paralelo e desenha cada um assim que fica pronto.
+
+        submit() reserva a posição do painel no layout (st.empty, dentro do container ou
+        coluna atual) e manda o cálculo (compute) para o pool de threads na hora; run()
+        espera os resultados na ordem em que terminam e chama render(resultado) dentro da
+        posição reservada, na thread do script. O tempo da página fica perto do painel mais
+        lento em vez da soma de todos.
+
+        É um pool de threads e não de processos: as funções dos painéis são definidas nos
+        scripts das páginas (não são importáveis para um processo filho) e os resultados
+        (figuras, dataframes) voltariam serializados. O pandas e o numpy liberam o GIL nas
+        operações pesadas e os caches (utils.figures, st.cache_data) são compartilhados.
+
+        Os cálculos não devem chamar st.* (widgets e elementos ficam no render) nem alterar
+        os dataframes recebidos, que são compartilhados entre as threads.
+
+        Input: quantidade de threads (padrão: PANEL_WORKERS; 0 calcula na thread do script)
+    """
+    def __init__(self, workers=None):
+        self.workers = PANEL_WORKERS if workers is None else workers
+        self.tasks = []
+
+    def submit(self, compute, *args, render, **kwargs):
+        """
+            Agenda compute(*args, **kwargs) e reserva a posição onde render(resultado) vai desenhar
+        """
+        placeholder = st.empty()
+        if self.workers > 0:
+            future = _get_executor(self.workers).submit(_call, get_script_run_ctx(), fork_run(), compute, args, kwargs)
+            self.tasks.append((future, placeholder, render))
+        else:
+            self.tasks.append((None, placeholder, lambda: render(compute(*args, **kwargs))))
+
+    def run(self):
+        """
+            Desenha os painéis à medida que os cálculos terminam (exceções são propagadas)
+        """
+        with step('panels', rows=len(self.tasks)):
+            pending = {}
+            for future, placeholder, render in self.tasks:
+                if future is None:
+                    with placeholder.container():
+                        render()
+                else:
+                    pending[future] = (placeholder, render)
+
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                # Entre os que terminaram juntos, mantém a ordem do layout
+                for future in [future for future in pending if future in done]:
+                    placeholder, render = pending.pop(future)
+                    with placeholder.container():
+                        render(future.result())
+        self.tasks = []
+
+#==================================================
+# Funções
+#==================================================
+def _get_executor(workers):
+    with _executor_lock:
+        if workers not in _executors:
+            _executors[workers] = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='panel-{}'.format(workers))
+        return _executors[workers]
+
+def _call(ctx, run, compute, args, kwargs):
+    # A thread do pool passa a responder pela sessão que agendou o painel
+    # (caches do Streamlit e etapas da instrumentação)
+    thread = threading.current_thread()
+    add_script_run_ctx(thread, ctx)
+    try:
+        with use_run(run):
+            return compute(*args, **kwargs)
+    finally:
+        add_script_run_ctx(thread, None)
@@ -0,0 +1,112 @@
+#==================================================
+# Import das Bibliotecas
+#==================================================
+
+import numpy as np
+import pandas as pd
+
+#==================================================
+# Configurações
+#==================================================
+
+# Dimensões em que os sketches são mantidos (granularidade de dia)
+SKETCH_DIMENSIONS = ['Order_Date', 'City', 'Road_traffic_density', 'Festival']
+
+# Colunas resumidas pelos sketches
+SKETCH_MEASURES = ['Time_taken(min)', 'Delivery_location_latitude', 'Delivery_location_longitude']
+
+# Compressão do t-digest: cada sketch guarda no máximo ~COMPRESSION centróides
+COMPRESSION = 100
+
+#==================================================
+# Funções
+#==================================================
+def _scale(q, compression):
+    """
+        Função de escala k1 do t-digest: centróides pequenos nas caudas (p1, p99)
+        e maiores no meio da distribuição.
+    """
+    return compression / (2 * np.pi) * np.arcsin(2 * np.clip(q, 0, 1) - 1)
+
+def compress(df_centroids, by, compression=COMPRESSION):
+    """
+        Comprime vários sketches de uma vez (t-digest em forma de tabela).
+        Os centróides de cada grupo são ordenados, cada um recebe o quantil do seu
+        ponto médio e os centróides cujo quantil cai na mesma faixa unitária da
+        escala k1 são fundidos (média ponderada). Como a entrada pode ser a
+        concatenação de sketches de pedaços ou de células diferentes, a mesma
+        função faz o merge dos sketches.
+        
+        Input: tabela de centróides (colunas by + 'mean' e 'weight') e chaves dos sketches
+        Output: tabela de centróides comprimida, ordenada por by e 'mean'
+    """
+    df_aux = df_centroids.loc[:, by + ['mean', 'weight']].sort_values(by + ['mean'], kind='stable')
+    keys = [df_aux[col] for col in by]
+    cumulative = df_aux['weight'].groupby(keys, observed=True).cumsum()
+    total = df_aux['weight'].groupby(keys, observed=True).transform('sum')
+    q = (cumulative - df_aux['weight'] / 2) / total
+
+    df_aux['bucket'] = np.floor(_scale(q.to_numpy(), compression)).astype('int64')
+    df_aux['weighted'] = df_aux['mean'] * df_aux['weight']
+    df_aux = (df_aux.groupby(by + ['bucket'], observed=True)[['weighted', 'weight']]
+                    .sum()
+                    .reset_index())
+    df_aux['mean'] = df_aux['weighted'] / df_aux['weight']
+    return df_aux.loc[:, by + ['mean', 'weight']]
+
+def build_sketches(df1, compression=COMPRESSION):
+    """
+        Constrói um sketch de quantis por célula de SKETCH_DIMENSIONS para cada
+        coluna de SKETCH_MEASURES. Valores NaN são ignorados.
+        
+        Input: Dataframe limpo
+        Output: tabela de centróides (SKETCH_DIMENSIONS + 'measure', 'mean', 'weight'),
+                ordenada por 'Order_Date'
+    """
+    frames = []
+    for col in SKETCH_MEASURES:
+        df_aux = df1.loc[df1[col].notna(), SKETCH_DIMENSIONS + [col]]
+        frames.append(df_aux.rename(columns={col: 'mean'}).assign(measure=col, weight=1.0))
+    df_centroids = pd.concat(frames, ignore_index=True)
+    return compress(df_centroids, SKETCH_DIMENSIONS + ['measure'], compression)
+
+def merge_sketches(frames, compression=COMPRESSION):
+    """
+        Combina tabelas de sketches (por exemplo, de pedaços diferentes do csv)
+    """
+    return compress(pd.concat(frames, ignore_index=True), SKETCH_DIMENSIONS + ['measure'], compression)
+
+def quantiles(df_sketch, by, measure, probs=(0.5, 0.9, 0.99), compression=COMPRESSION):
+    """
+        Quantis aproximados de uma medida, combinando os sketches das células
+        (já filtradas) em um sketch por grupo de by.
+        Cada quantil é interpolado entre os pontos médios dos centróides.
+        
+        Input: tabela de sketches filtrada, dimensões do resultado, medida e quantis
+        Output: Dataframe com as colunas by + 'p50', 'p90', ... (uma por quantil)
+    """
+    df_aux = df_sketch.loc[df_sketch['measure'] == measure, :]
+    df_aux = compress(df_aux, by, compression)
+
+    columns = ['p{:g}'.format(p * 100) for p in probs]
+    rows = []
+    # Com uma única dimensão agrupa pela coluna (a iteração com lista de tamanho 1 é depreciada no pandas)
+    for key, df_group in df_aux.groupby(by[0] if len(by) == 1 else by, observed=True, sort=True):
+        weight = df_group['weight'].to_numpy()
+        q = (np.cumsum(weight) - weight / 2) / weight.sum()
+        values = np.interp(probs, q, df_group['mean'].to_numpy())
+        rows.append(list(key if isinstance(key, tuple) else (key,)) + list(values))
+    return pd.DataFrame(rows, columns=by + columns)
+
+def median_locations(df_sketch, by=('City', 'Road_traffic_density')):
+    """
+        Mediana aproximada do local de entrega por grupo
+        
+        Input: tabela de sketches filtrada e dimensões do resultado
+        Output: Dataframe com as colunas by + 'Delivery_location_latitude' e 'Delivery_location_longitude'
+    """
+    by = list(by)
+    lat = quantiles(df_sketch, by, 'Delivery_location_latitude', probs=(0.5,))
+    lon = quantiles(df_sketch, by, 'Delivery_location_longitude', probs=(0.5,))
+    return (lat.rename(columns={'p50': 'Delivery_location_latitude'})
+               .merge(lon.rename(columns={'p50': 'Delivery_location_longitude'}), on=by))
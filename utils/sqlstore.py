@@ -0,0 +1,272 @@
+#==================================================
+# Import das Bibliotecas
+#==================================================
+
+import os
+import sqlite3
+import threading
+from contextlib import closing
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.cube import CUBE_DIMENSIONS, CUBE_MEASURES, MOMENT_COLUMNS
+from utils.data import DATASET_PATH, PRECOMPUTED_ONLY, add_distance, file_signature, to_float64
+from utils.stream import CHUNKSIZE, read_chunks
+from utils.topk import top_bottom_k_from_means
+
+#==================================================
+# Configurações
+#==================================================
+
+# Backend opcional: com CURRY_BACKEND=sqlite o cubo de métricas e os rankings de
+# entregadores vêm de agregações em SQL sobre o banco ao lado do csv
+SQL_BACKEND = os.environ.get('CURRY_BACKEND', 'memory').lower() == 'sqlite'
+
+# Versão do formato do banco (PRAGMA user_version): mudar sempre que a tabela ou os índices mudarem
+DATABASE_VERSION = 3
+
+# Colunas com índice na tabela de pedidos
+INDEXED_COLUMNS = ['Order_Date', 'Road_traffic_density', 'City', 'Delivery_person_ID']
+
+#==================================================
+# Funções
+#==================================================
+def database_path(path):
+    """
+        Caminho do banco SQLite dos pedidos limpos, ao lado do csv
+        (ex.: dataset/train.csv -> dataset/train.sqlite)
+    """
+    return os.path.splitext(path)[0] + '.sqlite'
+
+def _quote(col):
+    return '"{}"'.format(col)
+
+def _insert_orders(con, df1):
+    # As avaliações vão para o banco com o valor decimal do csv (float32 no snapshot)
+    df1 = df1.assign(Delivery_person_Ratings=to_float64(df1['Delivery_person_Ratings']))
+    df1.to_sql('orders', con, if_exists='append', index=False)
+
+def build_database(path=DATASET_PATH, chunksize=CHUNKSIZE):
+    """
+        Carrega os pedidos limpos (com a distância) na tabela 'orders' do banco,
+        lendo o csv em pedaços (a memória não depende do tamanho do histórico),
+        e cria os índices de INDEXED_COLUMNS. O banco é gravado em um arquivo
+        temporário e depois renomeado, como o snapshot.
+        
+        Output: caminho do banco
+    """
+    out_path = database_path(path)
+    tmp_path = out_path + '.tmp-{}'.format(os.getpid())
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    with closing(sqlite3.connect(tmp_path)) as con:
+        for df1 in read_chunks(path, chunksize):
+            _insert_orders(con, add_distance(df1))
+        for col in INDEXED_COLUMNS:
+            con.execute('CREATE INDEX idx_orders_{} ON orders ({})'.format(col.lower(), _quote(col)))
+        con.execute('PRAGMA user_version = {}'.format(DATABASE_VERSION))
+        con.commit()
+    os.replace(tmp_path, out_path)
+    return out_path
+
+def _database_version(db_path):
+    with closing(sqlite3.connect('file:{}?mode=ro'.format(db_path), uri=True)) as con:
+        return con.execute('PRAGMA user_version').fetchone()[0]
+
+def database_is_fresh(path=DATASET_PATH):
+    """
+        True quando o banco existe, não é mais antigo que o csv e foi gravado pela versão atual do formato
+    """
+    db_path = database_path(path)
+    return (os.path.exists(db_path) and os.stat(db_path).st_mtime_ns >= os.stat(path).st_mtime_ns
+            and _database_version(db_path) == DATABASE_VERSION)
+
+def append_database(df1, path=DATASET_PATH):
+    """
+        Insere pedidos limpos (formato do snapshot, já com a distância)
+        na tabela 'orders' do banco existente, em uma única transação: as conexões
+        abertas continuam vendo o banco anterior até o commit.
+    """
+    with closing(sqlite3.connect(database_path(path))) as con:
+        with con:
+            _insert_orders(con, df1)
+
+#==================================================
+# Classes
+#==================================================
+class SqlStore:
+    """
+        Consultas sobre o banco SQLite dos pedidos. Os filtros da barra lateral viram
+        um WHERE sobre colunas indexadas e os groupby são executados no próprio
+        banco, então só o resultado agregado chega ao pandas.
+        
+        O banco é aberto somente leitura, com uma conexão por thread (sessões do
+        Streamlit), e pode ser compartilhado por vários processos.
+    """
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._local = threading.local()
+
+    def _connection(self):
+        if getattr(self._local, 'con', None) is None:
+            self._local.con = sqlite3.connect('file:{}?mode=ro'.format(self.db_path), uri=True,
+                                              check_same_thread=False)
+        return self._local.con
+
+    def _where(self, date_limit, traffic_options):
+        if not traffic_options:
+            return '0', []
+        sql = 'Order_Date < ? AND Road_traffic_density IN ({})'.format(', '.join('?' * len(traffic_options)))
+        return sql, [pd.Timestamp(date_limit).strftime('%Y-%m-%d %H:%M:%S')] + list(traffic_options)
+
+    def query(self, sql, params=()):
+        return pd.read_sql_query(sql, self._connection(), params=params)
+
+    def cube(self, date_limit, traffic_options):
+        """
+            Cubo de métricas (mesmas colunas de utils.cube.build_cube) das linhas que
+            passam nos filtros, agregado no banco
+        """
+        dims = ', '.join(_quote(col) for col in CUBE_DIMENSIONS)
+        measures = ['COUNT(*) AS orders']
+        for col, name in CUBE_MEASURES.items():
+            measures += ['COUNT({0}) AS {1}_count'.format(_quote(col), name),
+                         'TOTAL({0}) AS {1}_sum'.format(_quote(col), name),
+                         'TOTAL({0} * {0}) AS {1}_sumsq'.format(_quote(col), name)]
+        where, params = self._where(date_limit, traffic_options)
+        df_cube = self.query('SELECT {0}, {1} FROM orders WHERE {2} GROUP BY {0}'.format(dims, ', '.join(measures), where),
+                             params)
+
+        # Mesmos tipos do cubo em memória (o resultado vazio chega como texto)
+        df_cube = df_cube.astype({col: 'int64' if col == 'orders' or col.endswith('_count') else 'float64'
+                                  for col in MOMENT_COLUMNS})
+        df_cube['Order_Date'] = pd.to_datetime(df_cube['Order_Date'])
+        for col in CUBE_DIMENSIONS[1:]:
+            df_cube[col] = df_cube[col].astype('category').cat.as_ordered()
+        return df_cube
+
+    def mean_by(self, date_limit, traffic_options, metric, by):
+        """
+            Média da métrica por grupo das colunas em by, agregada no banco
+            Output: Dataframe com as colunas by + metric, ordenado por by
+        """
+        dims = ', '.join(_quote(col) for col in by)
+        where, params = self._where(date_limit, traffic_options)
+        sql = 'SELECT {0}, AVG({1}) AS {1} FROM orders WHERE {2} GROUP BY {0} ORDER BY {0}'.format(
+            dims, _quote(metric), where)
+        return self.query(sql, params).astype({metric: 'float64'})
+
+    def deliverer_means(self, date_limit, traffic_options, metric='Time_taken(min)', by='City', key='Delivery_person_ID'):
+        """
+            Média da métrica por (by, key), agregada no banco
+            Output: Series com MultiIndex (by, key)
+        """
+        return self.mean_by(date_limit, traffic_options, metric, [by, key]).set_index([by, key])[metric]
+
+    def daily_orders(self, date_limit, traffic_options):
+        """
+            Pedidos por dia e entregador, contados no banco
+            Output: Dataframe com as colunas 'Order_Date', 'Delivery_person_ID' e 'orders'
+        """
+        where, params = self._where(date_limit, traffic_options)
+        df_aux = self.query('SELECT Order_Date, Delivery_person_ID, COUNT(*) AS orders FROM orders '
+                            'WHERE {} GROUP BY Order_Date, Delivery_person_ID'.format(where), params)
+        return df_aux.assign(Order_Date=pd.to_datetime(df_aux['Order_Date']), orders=df_aux['orders'].astype('int64'))
+
+    def dates(self):
+        """
+            Datas distintas dos pedidos (para a dimensão de calendário, ver utils.dates)
+        """
+        return pd.to_datetime(self.query('SELECT DISTINCT Order_Date FROM orders')['Order_Date']).to_numpy()
+
+    def kpis(self, date_limit, traffic_options, kpis):
+        """
+            Métricas gerais declaradas como em utils.kpis.KPIS, calculadas em uma única
+            consulta: a condição de cada métrica vira um CASE WHEN dentro do agregado e o
+            desvio padrão (ddof=1) sai da contagem, da soma e da soma dos quadrados.
+            Grupos sem linhas dão NaN (0 para 'count' e 'nunique'), como no cálculo em memória.
+            
+            Output: dicionário nome -> valor
+        """
+        aggregates = {'nunique': ['COUNT(DISTINCT {0})'], 'count': ['COUNT({0})'], 'mean': ['AVG({0})'],
+                      'min': ['MIN({0})'], 'max': ['MAX({0})'],
+                      'std': ['COUNT({0})', 'TOTAL({0})', 'TOTAL({0} * {0})']}
+        expressions, params = [], []
+        for col, op, where in kpis.values():
+            if op not in aggregates:
+                raise ValueError('Operação desconhecida: {}'.format(op))
+            value = _quote(col)
+            if where is not None:
+                value = 'CASE WHEN {} = ? THEN {} END'.format(_quote(where[0]), value)
+            for aggregate in aggregates[op]:
+                expressions.append(aggregate.format(value))
+                params += [where[1]] * aggregate.count('{0}') if where is not None else []
+        where_sql, where_params = self._where(date_limit, traffic_options)
+        row = self._connection().execute('SELECT {} FROM orders WHERE {}'.format(', '.join(expressions), where_sql),
+                                         params + where_params).fetchone()
+
+        results, values = {}, iter(row)
+        for name, (_, op, _) in kpis.items():
+            if op == 'std':
+                count, total, sumsq = next(values), next(values), next(values)
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    mean = np.float64(total) / count
+                    results[name] = np.sqrt(np.maximum(sumsq - count * mean ** 2, 0) / np.float64(count - 1))
+            else:
+                value = next(values)
+                results[name] = np.nan if value is None else value
+        return results
+
+    def top_bottom_k(self, date_limit, traffic_options, metric='Time_taken(min)', k=10, by='City', key='Delivery_person_ID'):
+        """
+            Mesmo resultado de utils.topk.top_bottom_k, com as médias calculadas no banco
+        """
+        return top_bottom_k_from_means(self.deliverer_means(date_limit, traffic_options, metric, by, key), k)
+
+class SqlCubeFilter:
+    """
+        Substituto de utils.filters.OrderFilter sobre o cubo de métricas:
+        filter() devolve o cubo já agregado no banco
+    """
+    def __init__(self, store):
+        self.store = store
+
+    def filter(self, date_limit, traffic_options):
+        return self.store.cube(date_limit, traffic_options)
+
+#==================================================
+# Funções
+#==================================================
+def open_store(path=DATASET_PATH):
+    """
+        Abre o banco dos pedidos, reconstruindo-o quando não existe, quando o csv
+        é mais novo ou quando foi gravado por outra versão do formato
+    """
+    db_path = database_path(path)
+    if not database_is_fresh(path):
+        if PRECOMPUTED_ONLY:
+            raise FileNotFoundError('Banco {} ausente ou desatualizado: rode python -m utils.precompute --sqlite {}'.format(db_path, path))
+        build_database(path)
+    return SqlStore(db_path)
+
+@st.cache_resource(max_entries=1, show_spinner=False)
+def _load_store(path, signature):
+    return open_store(path)
+
+def load_store(path=DATASET_PATH):
+    """
+        Banco dos pedidos, compartilhado entre sessões
+    """
+    return _load_store(path, file_signature(path))
+
+def sql_top_delivers(date_limit, traffic_options, k=10, path=DATASET_PATH):
+    """
+        Mais rápidos e mais lentos por cidade calculados no banco, ou None quando
+        o backend SQL está desligado
+    """
+    if not SQL_BACKEND:
+        return None
+    return load_store(path).top_bottom_k(date_limit, traffic_options, k=k)
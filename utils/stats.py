@@ -0,0 +1,60 @@
+#==================================================
+# Import das Bibliotecas
+#==================================================
+
+import numpy as np
+import pandas as pd
+
+from utils.data import to_float64
+
+#==================================================
+# Funções
+#==================================================
+def moments(df1, by, col):
+    """
+        Momentos de Welford (contagem, média e M2 = soma dos quadrados dos desvios)
+        da coluna col por grupo. Valores NaN são ignorados, como no pandas.
+        
+        Input: Dataframe, lista de colunas de agrupamento e coluna numérica
+        Output: Dataframe indexado por by com as colunas 'count', 'mean' e 'm2'
+    """
+    values = to_float64(df1[col])
+    grouped = values.groupby([df1[c] for c in by], observed=True)
+    df_aux = pd.DataFrame({'count': grouped.count(), 'mean': grouped.mean()})
+    df_aux['m2'] = grouped.var(ddof=0) * df_aux['count']
+    return df_aux.fillna({'mean': 0.0, 'm2': 0.0})
+
+def merge_moments(left, right):
+    """
+        Combina dois conjuntos de momentos (merge paralelo de Welford / Chan et al.):
+            n = na + nb
+            delta = média_b - média_a
+            média = média_a + delta * nb / n
+            M2 = M2_a + M2_b + delta² * na * nb / n
+        Grupos presentes em apenas um dos lados são mantidos como estão.
+        
+        Input: dois Dataframes no formato de moments()
+        Output: Dataframe no mesmo formato
+    """
+    left, right = left.align(right, join='outer', fill_value=0)
+    n_left, n_right = left['count'], right['count']
+    n = n_left + n_right
+    delta = right['mean'] - left['mean']
+    share = (n_right / n).where(n > 0, 0.0)
+
+    merged = pd.DataFrame({'count': n}, index=left.index)
+    merged['mean'] = left['mean'] + delta * share
+    merged['m2'] = left['m2'] + right['m2'] + delta ** 2 * n_left * share
+    return merged
+
+def moments_to_stats(df_moments):
+    """
+        Converte momentos em média e desvio padrão amostral (ddof=1, como no pandas)
+        
+        Input: Dataframe no formato de moments()
+        Output: Dataframe com as colunas 'count', 'mean' e 'std'
+    """
+    n = df_moments['count']
+    return pd.DataFrame({'count': n,
+                         'mean': df_moments['mean'].where(n > 0),
+                         'std': np.sqrt(df_moments['m2'] / (n - 1)).where(n > 1)})
@@ -0,0 +1,147 @@
+#==================================================
+# Import das Bibliotecas
+#==================================================
+
+import argparse
+import tracemalloc
+
+import pandas as pd
+
+from utils.cube import CUBE_DIMENSIONS, MOMENT_COLUMNS, build_cube
+from utils.data import DATASET_PATH, clean_code, to_snapshot_dtypes
+from utils.sketches import build_sketches, merge_sketches
+from utils.stats import merge_moments, moments
+
+#==================================================
+# Configurações
+#==================================================
+
+# Quantidade padrão de linhas do csv lidas por vez
+CHUNKSIZE = 100_000
+
+# Colunas lidas sempre como texto, para que todos os pedaços tenham os mesmos tipos
+# (um pedaço sem nenhum 'NaN ' seria lido como número, e um pedaço em que uma coluna
+# de texto só tem 'NaN' seria lido como float, sem o acessor .str da limpeza)
+RAW_DTYPES = {col: str for col in ['ID', 'Delivery_person_ID', 'Delivery_person_Age', 'Delivery_person_Ratings',
+                                   'Order_Date', 'Time_Orderd', 'Time_Order_picked', 'Weatherconditions',
+                                   'Road_traffic_density', 'multiple_deliveries', 'Type_of_order',
+                                   'Type_of_vehicle', 'Festival', 'City', 'Time_taken(min)']}
+
+#==================================================
+# Classes
+#==================================================
+class StreamAggregates:
+    """
+        Agregados combináveis do dataset, construídos pedaço a pedaço:
+        
+        - cube: cubo de métricas (ver utils.cube), somado célula a célula
+        - time_by_deliver: momentos de Welford do tempo de entrega por (City, Delivery_person_ID)
+        - rating_by_deliver: momentos de Welford da avaliação por Delivery_person_ID
+        - orders_by_week: quantidade de pedidos por semana do ano (chave inteira, ver utils.dates.Calendar)
+        - delivers_by_week: conjunto de entregadores únicos por semana do ano
+        - sketches: sketches de quantis por (dia, City, Road_traffic_density, Festival), ver utils.sketches
+        
+        Duas instâncias construídas sobre partes diferentes dos dados podem ser
+        combinadas com merge(), então a memória usada depende só do número de grupos.
+    """
+    def __init__(self):
+        self.rows = 0
+        self.cube = None
+        self.time_by_deliver = None
+        self.rating_by_deliver = None
+        self.orders_by_week = pd.Series(dtype='int64')
+        self.delivers_by_week = {}
+        self.sketches = None
+
+    def update(self, df1):
+        """
+            Incorpora um pedaço já limpo (saída de clean_code)
+        """
+        other = StreamAggregates()
+        other.rows = len(df1)
+        other.cube = build_cube(df1)
+        other.time_by_deliver = moments(df1, ['City', 'Delivery_person_ID'], 'Time_taken(min)')
+        other.rating_by_deliver = moments(df1, ['Delivery_person_ID'], 'Delivery_person_Ratings')
+
+        # Import local: utils.dates depende de utils.sqlstore, que importa este módulo
+        from utils.dates import Calendar
+
+        # Semana do ano pela dimensão de calendário (uma linha por data distinta, sem strftime por pedido)
+        dates = df1['Order_Date'].to_numpy()
+        calendar = Calendar(dates)
+        week_of_year = pd.Series(calendar.keys('week_of_year', calendar.codes(dates)).astype('int64'), index=df1.index)
+        other.orders_by_week = week_of_year.value_counts()
+        for week, delivers in df1['Delivery_person_ID'].groupby(week_of_year):
+            other.delivers_by_week[week] = set(delivers.unique())
+        other.sketches = build_sketches(df1)
+
+        return self.merge(other)
+
+    def merge(self, other):
+        """
+            Combina os agregados de outra instância nesta (in-place) e retorna self
+        """
+        if other.rows == 0:
+            return self
+        if self.rows == 0:
+            self.__dict__.update(other.__dict__)
+            return self
+
+        self.rows += other.rows
+        self.cube = (pd.concat([self.cube, other.cube], ignore_index=True)
+                       .groupby(CUBE_DIMENSIONS, observed=True)[MOMENT_COLUMNS]
+                       .sum()
+                       .reset_index())
+        self.time_by_deliver = merge_moments(self.time_by_deliver, other.time_by_deliver)
+        self.rating_by_deliver = merge_moments(self.rating_by_deliver, other.rating_by_deliver)
+        self.orders_by_week = self.orders_by_week.add(other.orders_by_week, fill_value=0).astype('int64')
+        for week, delivers in other.delivers_by_week.items():
+            self.delivers_by_week.setdefault(week, set()).update(delivers)
+        self.sketches = merge_sketches([self.sketches, other.sketches])
+        return self
+
+#==================================================
+# Funções
+#==================================================
+def read_chunks(path=DATASET_PATH, chunksize=CHUNKSIZE):
+    """
+        Lê o csv em pedaços de chunksize linhas e aplica a limpeza em cada um.
+        
+        Input: caminho do csv e tamanho do pedaço
+        Output: gerador de Dataframes limpos
+    """
+    for df in pd.read_csv(path, chunksize=chunksize, dtype=RAW_DTYPES):
+        yield to_snapshot_dtypes(clean_code(df))
+
+def ingest_csv(path=DATASET_PATH, chunksize=CHUNKSIZE):
+    """
+        Constrói os agregados do dataset sem carregar o csv inteiro na memória:
+        a memória fica limitada pelo tamanho do pedaço e pelo número de grupos.
+        
+        Input: caminho do csv e tamanho do pedaço
+        Output: StreamAggregates
+    """
+    aggregates = StreamAggregates()
+    for df1 in read_chunks(path, chunksize):
+        aggregates.update(df1)
+    return aggregates
+
+#==================================================
+# Execução
+#==================================================
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Ingestão do csv de pedidos em pedaços.')
+    parser.add_argument('csv', nargs='?', default=DATASET_PATH, help='csv bruto de pedidos')
+    parser.add_argument('--chunksize', type=int, default=CHUNKSIZE, help='linhas lidas por vez')
+    args = parser.parse_args()
+
+    tracemalloc.start()
+    aggregates = ingest_csv(args.csv, args.chunksize)
+    _, peak = tracemalloc.get_traced_memory()
+
+    print('Pedidos limpos: {}'.format(aggregates.rows))
+    print('Células do cubo: {}'.format(len(aggregates.cube)))
+    print('Entregadores: {}'.format(len(aggregates.rating_by_deliver)))
+    print('Semanas: {}'.format(len(aggregates.orders_by_week)))
+    print('Pico de memória: {:.1f} MB'.format(peak / 1024 ** 2))
@@ -0,0 +1,141 @@
+#==================================================
+# Import das Bibliotecas
+#==================================================
+
+import math
+
+import numpy as np
+import streamlit as st
+
+from utils.data import DATASET_PATH, file_signature, to_float64
+from utils.filters import load_order_filter
+from utils.instrument import dataframe
+from utils.sqlstore import SQL_BACKEND, load_store
+
+#==================================================
+# Configurações
+#==================================================
+
+# Linhas enviadas ao navegador por página
+PAGE_SIZE = 50
+
+#==================================================
+# Classes
+#==================================================
+class SortedTable:
+    """
+        Tabela com ordenações pré-calculadas para paginação no servidor.
+        
+        - Cada coluna tem a ordem crescente e decrescente calculadas uma única vez
+          (valores NaN ficam sempre no final).
+        - A busca por prefixo da chave usa busca binária na ordem da chave, então
+          cada consulta custa O(log n + linhas da página) quando não há busca e
+          O(log n + m log m) para as m linhas que casam com o prefixo.
+    """
+    def __init__(self, df, key):
+        self.df = df.reset_index(drop=True)
+        self.key = key
+        self.columns = list(self.df.columns)
+        self._orders = {}
+        self._ranks = {}
+
+        self.key_order = self.order(key, True)
+        self.sorted_keys = self.df[key].astype(str).to_numpy()[self.key_order]
+
+    def order(self, col, ascending):
+        """
+            Posições das linhas ordenadas pela coluna (calculadas na primeira chamada)
+        """
+        if (col, ascending) not in self._orders:
+            values = self.df[col].to_numpy()
+            if ascending:
+                order = np.argsort(values, kind='stable')
+            elif np.issubdtype(values.dtype, np.number):
+                order = np.argsort(-values, kind='stable')
+            else:
+                order = self.order(col, True)[::-1]
+            self._orders[(col, ascending)] = order
+        return self._orders[(col, ascending)]
+
+    def rank(self, col, ascending):
+        """
+            Posição de cada linha na ordenação da coluna (inverso de order)
+        """
+        if (col, ascending) not in self._ranks:
+            order = self.order(col, ascending)
+            rank = np.empty(len(order), dtype='int64')
+            rank[order] = np.arange(len(order))
+            self._ranks[(col, ascending)] = rank
+        return self._ranks[(col, ascending)]
+
+    def rows(self, prefix='', sort_by=None, ascending=True):
+        """
+            Posições de todas as linhas que casam com o prefixo, na ordem pedida
+        """
+        sort_by = sort_by or self.key
+        if not prefix:
+            return self.order(sort_by, ascending)
+
+        start = np.searchsorted(self.sorted_keys, prefix, side='left')
+        end = np.searchsorted(self.sorted_keys, prefix + '\uffff', side='left')
+        rows = self.key_order[start:end]
+        if sort_by == self.key:
+            return rows if ascending else rows[::-1]
+        return rows[np.argsort(self.rank(sort_by, ascending)[rows], kind='stable')]
+
+    def page(self, prefix='', sort_by=None, ascending=True, page=0, page_size=PAGE_SIZE):
+        """
+            Input: prefixo da chave, coluna e sentido da ordenação, página (começando em 0)
+            Output: (Dataframe com as linhas da página, total de linhas que casam com o prefixo)
+        """
+        rows = self.rows(prefix, sort_by, ascending)
+        start = page * page_size
+        return self.df.iloc[rows[start:start + page_size]], len(rows)
+
+#==================================================
+# Funções
+#==================================================
+def paginated_dataframe(table, key, page_size=PAGE_SIZE):
+    """
+        Componente de tabela paginada no servidor: busca por prefixo do ID,
+        ordenação e página. A cada interação só as linhas da página são enviadas.
+        
+        Input: SortedTable, chave única dos widgets e linhas por página
+    """
+    col1, col2, col3 = st.columns([2, 2, 1])
+    prefix = col1.text_input('Buscar por ID', key=key + '_prefix').strip()
+    sort_by = col2.selectbox('Ordenar por', table.columns, key=key + '_sort_by')
+    descending = col3.checkbox('Decrescente', key=key + '_descending')
+
+    total = len(table.rows(prefix, sort_by, not descending))
+    pages = max(1, math.ceil(total / page_size))
+    page = st.number_input('Página', min_value=1, max_value=pages, value=1, key=key + '_page')
+
+    df_page, total = table.page(prefix, sort_by, not descending, min(page, pages) - 1, page_size)
+    dataframe(df_page, hide_index=True)
+    st.caption('Página {} de {} ({} linhas)'.format(min(page, pages), pages, total))
+
+@st.cache_resource(max_entries=32, show_spinner=False)
+def _ratings_per_deliver_table(date_limit, traffic_options, path, signature):
+    if SQL_BACKEND:
+        df_avg_ratings_per_deliver = load_store(path).mean_by(date_limit, list(traffic_options), 'Delivery_person_Ratings',
+                                                              ['Delivery_person_ID'])
+        return SortedTable(df_avg_ratings_per_deliver, 'Delivery_person_ID')
+
+    df1 = load_order_filter(path).filter(date_limit, list(traffic_options),
+                                         columns=['Delivery_person_ID', 'Delivery_person_Ratings'])
+    # Médias em float64 a partir do valor decimal das avaliações (float32 no snapshot)
+    df_avg_ratings_per_deliver = (df1.assign(Delivery_person_Ratings=to_float64(df1['Delivery_person_Ratings']))
+                                     .loc[:, ['Delivery_person_ID', 'Delivery_person_Ratings']]
+                                     .groupby('Delivery_person_ID', observed=True)
+                                     .mean()
+                                     .reset_index())
+    return SortedTable(df_avg_ratings_per_deliver, 'Delivery_person_ID')
+
+def ratings_per_deliver_table(date_limit, traffic_options, path=DATASET_PATH):
+    """
+        Avaliação média por entregador como SortedTable, em cache por estado dos filtros
+        e pela versão do dataset (a paginação não refaz o groupby; com o backend SQL,
+        as médias são agregadas no banco)
+    """
+    return _ratings_per_deliver_table(date_limit, tuple(traffic_options), path, file_signature(path))
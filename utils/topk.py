@@ -0,0 +1,62 @@
+#==================================================
+# Import das Bibliotecas
+#==================================================
+
+import numpy as np
+
+#==================================================
+# Funções
+#==================================================
+def _select(rows, values, labels, k, largest):
+    """
+        Seleciona as k posições de rows com os menores (ou maiores) valores com
+        seleção parcial (np.partition, O(n)) e ordena apenas essas posições,
+        desempatando pelo código do rótulo para que o resultado seja determinístico.
+    """
+    sign = -1 if largest else 1
+    if len(rows) > k:
+        # Mantém todos os empatados com o k-ésimo valor, para desempatar pelo rótulo
+        kth = np.partition(sign * values[rows], k - 1)[k - 1]
+        rows = rows[sign * values[rows] <= kth]
+    return rows[np.lexsort((labels[rows], sign * values[rows]))][:k]
+
+def top_bottom_k_from_means(means, k=10):
+    """
+        Os k menores e os k maiores valores de cada grupo do primeiro nível do índice.
+        
+        Input: Series com MultiIndex (grupo, entregador), por exemplo a média por entregador
+               de utils.stream.StreamAggregates, e k
+        Output: (Dataframe dos menores, Dataframe dos maiores), com as linhas de cada
+                grupo em sequência e ordenadas do extremo para o centro
+    """
+    means = means.dropna()
+    values = means.to_numpy(dtype='float64')
+    # Códigos do MultiIndex: grupo e posição do rótulo do entregador (níveis ordenados pelo groupby)
+    groups = means.index.codes[0].astype('int64')
+    labels = means.index.codes[1]
+
+    order = np.argsort(groups, kind='stable')
+    bounds = np.searchsorted(groups[order], np.arange(groups.max() + 2 if len(groups) else 1))
+
+    lowest, highest = [], []
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        rows = order[start:end]
+        lowest.append(_select(rows, values, labels, k, largest=False))
+        highest.append(_select(rows, values, labels, k, largest=True))
+
+    df_lowest = means.iloc[np.concatenate(lowest) if lowest else []].reset_index()
+    df_highest = means.iloc[np.concatenate(highest) if highest else []].reset_index()
+    return df_lowest, df_highest
+
+def top_bottom_k(df1, metric='Time_taken(min)', k=10, by='City', key='Delivery_person_ID'):
+    """
+        Ranking dos entregadores em todas as cidades de uma vez: calcula a média da
+        métrica por (by, key) em um único groupby e seleciona as duas pontas de cada
+        cidade com seleção parcial, sem ordenar todos os entregadores.
+        
+        Input: Dataframe filtrado, métrica ('Time_taken(min)' ou 'Delivery_person_Ratings'),
+               k, coluna de grupo e coluna do entregador
+        Output: (k menores médias por grupo, k maiores médias por grupo)
+    """
+    means = df1.loc[:, [by, key, metric]].groupby([by, key], observed=True)[metric].mean()
+    return top_bottom_k_from_means(means, k)